@@ -1,13 +1,104 @@
 import random
+import threading
+import time
 from math import inf
 from piece import *
+from transposition import *
+from ordering import *
+from evaluation import PIECE_VALUES, taper
+import zobrist
+
+# Score of a checkmated position, from the perspective of the winner
+CHECKMATE = 100000
+
+# Shared transposition table used by minimax when no other table is given
+TABLE = TranspositionTable()
+
+# Shared killer and history tables used by minimax when no other ordering is given
+ORDERING = MoveOrdering()
+
+# Deepest iteration iterative_deepening will start
+MAX_DEPTH = 64
+
+# Search moves after the first with a null window and only re-search them if they turn out better
+PRINCIPAL_VARIATION = True
+
+# Selective search, each of which can be switched off to compare results. Null-move pruning, razoring and
+# futility pruning only apply to nodes searched with a null window, so they also need PRINCIPAL_VARIATION
+NULL_MOVE = True
+LATE_MOVE_REDUCTION = True
+RAZORING = True
+FUTILITY = True
+
+# Depth a null move search is reduced by, and the least depth to try a null move at
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+
+# Quiet moves from this index in the ordered list are searched one ply less deep at this depth or more
+LMR_MIN_INDEX = 3
+LMR_MIN_DEPTH = 3
+
+# Margins by remaining depth; razoring and futility pruning apply at depths below the length of the tuple
+RAZOR_MARGINS = (0, 300, 500)
+FUTILITY_MARGINS = (0, 200, 500)
+
+# Half-width of the window around the previous iteration's score that each iteration starts with; 0 disables
+ASPIRATION_WINDOW = 50
+
+# Quiescence search skips captures that can't raise the score to alpha even with this much positional gain
+DELTA_MARGIN = 200
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside minimax when the search has used up its time or node budget
+    """
+    pass
+
+
+class SearchLimits:
+
+    def __init__(self, deadline=None, max_nodes=None, stop=None):
+        """
+        Budget of a search; minimax raises SearchTimeout once it is exceeded
+        :param deadline: time.monotonic() value after which the search stops (float)
+        :param max_nodes: number of nodes after which the search stops (int)
+        :param stop: stops the search when set from another thread (threading.Event)
+        """
+        self.deadline = deadline
+        self.max_nodes = max_nodes
+        self.stop = stop
+        self.nodes = 0
+
+        # Nodes visited by quiescence search; included in nodes
+        self.quiescence_nodes = 0
+
+        # Null-window searches that had to be repeated with the full window
+        self.researches = 0
+
+        # Iterations whose score fell outside the aspiration window and had to be searched again
+        self.fail_highs = 0
+        self.fail_lows = 0
+
+    def check(self):
+        """
+        Counts a node and raises SearchTimeout if the budget is exceeded
+        :return: None
+        """
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchTimeout()
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise SearchTimeout()
+        if self.stop is not None and self.stop.is_set():
+            raise SearchTimeout()
 
 
 def random_move(board):
     """
     Selects a random move from the valid moves for the current players turn
     :param board: the current board being used for the game (Board)
-    :return: tuple representing move; format: ((sourceX, sourceY), (destX, destY))
+    :return: packed move, see encoding.py (int)
     """
     moves = board.get_moves()
     if moves:
@@ -21,10 +112,20 @@ def evaluate(board, maximizing_color):
     :param maximizing_color: color associated with maximizing player (tuple)
     :return: integer representing boards value
     """
-    pass    # YOUR CODE GOES HERE # DELETE THIS LINE #
+    if board.gameover:
+        if board.gameover[0] == "Checkmate":
+            return CHECKMATE if board.gameover[1] == maximizing_color else -CHECKMATE
+        return 0
+
+    # Material plus piece-square scores blended by phase, all kept up to date by make_move
+    score = board.whiteScore - board.blackScore + taper(board.opening_score, board.endgame_score, board.phase)
+    if maximizing_color == WHITE:
+        return score
+    else:
+        return -score
 
 
-def minimax(board, depth, alpha, beta, maximizing_player, maximizing_color):
+def minimax(board, depth, alpha, beta, maximizing_player, maximizing_color, table=None, limits=None, ordering=None):
     """
     Minimax algorithm used to find best move for the AI
     :param board: the current board being used for the game (Board)
@@ -33,6 +134,389 @@ def minimax(board, depth, alpha, beta, maximizing_player, maximizing_color):
     :param beta: the best value that the minimizer currently can guarantee at that level or above (int)
     :param maximizing_player: True if current player is maximizing player (bool)
     :param maximizing_color: color of the AI using this function to determine a move (tuple)
+    :param table: transposition table to use, defaults to the shared TABLE (TranspositionTable)
+    :param limits: time or node budget of the search, unlimited if None (SearchLimits)
+    :param ordering: killer and history tables, defaults to the shared ORDERING (MoveOrdering)
+    :return: tuple representing move and eval; format: (move, eval)
+    """
+    if depth == 0 and not board.gameover:
+        return None, quiescence(board, alpha, beta, maximizing_player, maximizing_color, limits)
+
+    if limits is not None:
+        limits.check()
+
+    if board.gameover:
+        return None, evaluate(board, maximizing_color)
+
+    if table is None:
+        table = TABLE
+    if ordering is None:
+        ordering = ORDERING
+
+    # Scores are relative to maximizing_color, so it has to be part of the key
+    key = board.hash
+    if maximizing_color == BLACK:
+        key ^= zobrist.BLACK_PERSPECTIVE
+
+    # Use stored result if it was searched deep enough, otherwise just try its best move first
+    alpha_orig, beta_orig = alpha, beta
+    hash_move = None
+    entry = table.probe(key)
+    if entry is not None:
+        entry_depth, flag, score, hash_move = entry
+        if entry_depth >= depth:
+            if flag == EXACT:
+                return hash_move, score
+            elif flag == LOWER:
+                alpha = max(alpha, score)
+            else:
+                beta = min(beta, score)
+            if alpha >= beta:
+                return hash_move, score
+
+    # Nodes searched with a null window only need to prove a bound, so they can be pruned selectively. The
+    # root and the principal variation are always searched with a wider window
+    pv_node = beta - alpha > 1
+    in_check = board.in_check(board.turn)
+    static_eval = evaluate(board, maximizing_color)
+
+    if not pv_node and not in_check:
+        # Null move: if passing still beats the bound, a real move will too. Passing is only safe if the side to
+        # move has pieces besides pawns, since in pawn endings every move can be worse than passing (zugzwang)
+        if NULL_MOVE and depth >= NULL_MOVE_MIN_DEPTH and board.past_moves and board.past_moves[-1] is not None \
+                and board.non_pawn_material(board.turn) \
+                and (static_eval >= beta if maximizing_player else static_eval <= alpha):
+            board.make_null_move()
+            if maximizing_player:
+                score = minimax(board, depth - 1 - NULL_MOVE_REDUCTION, beta - 1, beta, False, maximizing_color,
+                                table, limits, ordering)[1]
+            else:
+                score = minimax(board, depth - 1 - NULL_MOVE_REDUCTION, alpha, alpha + 1, True, maximizing_color,
+                                table, limits, ordering)[1]
+            board.unmake_move()
+            if (score >= beta) if maximizing_player else (score <= alpha):
+                return None, score
+
+        # Razoring: far below the bound near the leaves, only captures can save the position
+        if RAZORING and depth < len(RAZOR_MARGINS):
+            if maximizing_player and static_eval + RAZOR_MARGINS[depth] <= alpha:
+                score = quiescence(board, alpha, beta, True, maximizing_color, limits)
+                if score <= alpha:
+                    return None, score
+            elif not maximizing_player and static_eval - RAZOR_MARGINS[depth] >= beta:
+                score = quiescence(board, alpha, beta, False, maximizing_color, limits)
+                if score >= beta:
+                    return None, score
+
+    moves = board.get_moves()
+
+    # No legal moves: checkmate or stalemate
+    if not moves:
+        if not in_check:
+            return None, 0
+        return None, -CHECKMATE if maximizing_player else CHECKMATE
+
+    ply = len(board.past_moves)
+    ordering.order(board, moves, hash_move, ply)
+    best_move = moves[0]
+
+    # Skip quiet moves that can't bring the score back to the bound this close to the leaves
+    futile = False
+    if FUTILITY and not pv_node and not in_check and depth < len(FUTILITY_MARGINS):
+        if maximizing_player:
+            futile = static_eval + FUTILITY_MARGINS[depth] <= alpha
+        else:
+            futile = static_eval - FUTILITY_MARGINS[depth] >= beta
+
+    def search(child_depth, child_alpha, child_beta):
+        return minimax(board, child_depth, child_alpha, child_beta, not maximizing_player, maximizing_color, table,
+                       limits, ordering)[1]
+
+    best_eval = -inf if maximizing_player else inf
+    for index, move in enumerate(moves):
+        quiet = not move & (CAPTURE | PROMOTION_MASK)
+        if futile and quiet and index > 0:
+            continue
+
+        board.make_move(move)
+        board.next_turn()
+
+        # Quiet moves ordered late are searched less deep first, and only properly if they turn out better
+        reduction = 0
+        if LATE_MOVE_REDUCTION and quiet and index >= LMR_MIN_INDEX and depth >= LMR_MIN_DEPTH and not in_check:
+            reduction = 1
+
+        if index == 0 or not (PRINCIPAL_VARIATION or reduction):
+            current_eval = search(depth - 1, alpha, beta)
+        else:
+            # Null window: only prove the move is no better than the bound
+            if not PRINCIPAL_VARIATION:
+                low, high = alpha, beta
+            elif maximizing_player:
+                low, high = alpha, alpha + 1
+            else:
+                low, high = beta - 1, beta
+            current_eval = search(depth - 1 - reduction, low, high)
+            if reduction and (current_eval > alpha if maximizing_player else current_eval < beta):
+                current_eval = search(depth - 1, low, high)
+            if PRINCIPAL_VARIATION and alpha < current_eval < beta:
+                if limits is not None:
+                    limits.researches += 1
+                current_eval = search(depth - 1, alpha, beta)
+        board.unmake_move()
+
+        if maximizing_player:
+            if current_eval > best_eval:
+                best_eval = current_eval
+                best_move = move
+            alpha = max(alpha, current_eval)
+        else:
+            if current_eval < best_eval:
+                best_eval = current_eval
+                best_move = move
+            beta = min(beta, current_eval)
+        if beta <= alpha:
+            ordering.cutoff(move, index, depth, ply)
+            break
+
+    if best_eval <= alpha_orig:
+        flag = UPPER
+    elif best_eval >= beta_orig:
+        flag = LOWER
+    else:
+        flag = EXACT
+    table.store(key, depth, flag, best_eval, best_move)
+
+    return best_move, best_eval
+
+
+def quiescence(board, alpha, beta, maximizing_player, maximizing_color, limits=None):
+    """
+    Searches captures and promotions only until the position is quiet, so that minimax doesn't evaluate
+    positions in the middle of an exchange
+    :param board: the current board being used for the game (Board)
+    :param alpha: the best value that the maximizer currently can guarantee at that level or above (int)
+    :param beta: the best value that the minimizer currently can guarantee at that level or above (int)
+    :param maximizing_player: True if current player is maximizing player (bool)
+    :param maximizing_color: color of the AI using this function to determine a move (tuple)
+    :param limits: time or node budget of the search, unlimited if None (SearchLimits)
+    :return: eval (int)
+    """
+    if limits is not None:
+        limits.check()
+        limits.quiescence_nodes += 1
+
+    stand_pat = evaluate(board, maximizing_color)
+    if board.gameover:
+        return stand_pat
+
+    # In check every evasion has to be searched, since standing pat may not be possible
+    in_check = board.in_check(board.turn)
+    if in_check:
+        moves = board.get_moves()
+        if not moves:
+            return -CHECKMATE if maximizing_player else CHECKMATE
+        best_eval = -inf if maximizing_player else inf
+    else:
+        # Stand pat: the side to move can usually do at least as well as the static eval by not capturing
+        if maximizing_player:
+            if stand_pat >= beta:
+                return stand_pat
+            alpha = max(alpha, stand_pat)
+        else:
+            if stand_pat <= alpha:
+                return stand_pat
+            beta = min(beta, stand_pat)
+        best_eval = stand_pat
+        moves = board.get_moves(captures_only=True)
+    moves.sort(key=lambda m: mvv_lva(board, m), reverse=True)
+
+    for move in moves:
+        if not in_check:
+            # Captures that lose material once the square is fought over can't improve on standing pat
+            if losing_capture(board, move):
+                continue
+
+            # Delta pruning: skip captures that can't reach the bound even when winning the piece outright
+            gain = DELTA_MARGIN
+            if move & CAPTURE:
+                gain += PIECE_VALUES[board.type_at(move >> DEST_SHIFT & SQUARE_MASK)]
+            if move & PROMOTION_MASK:
+                gain += PIECE_VALUES[Queen] - PIECE_VALUES[Pawn]
+            if maximizing_player and stand_pat + gain <= alpha:
+                continue
+            if not maximizing_player and stand_pat - gain >= beta:
+                continue
+
+        board.make_move(move)
+        board.next_turn()
+        current_eval = quiescence(board, alpha, beta, not maximizing_player, maximizing_color, limits)
+        board.unmake_move()
+        if maximizing_player:
+            best_eval = max(best_eval, current_eval)
+            alpha = max(alpha, current_eval)
+        else:
+            best_eval = min(best_eval, current_eval)
+            beta = min(beta, current_eval)
+        if beta <= alpha:
+            break
+
+    return best_eval
+
+
+def allocate_time(remaining, moves_to_go=30):
+    """
+    Decides how long the AI may think about a move given the time left on its clock
+    :param remaining: seconds left on the AI's timer (float)
+    :param moves_to_go: number of moves the remaining time should last for (int)
+    :return: number of seconds to search for (float)
+    """
+    return max(0.05, min(remaining / moves_to_go, remaining / 2))
+
+
+def aspiration_search(board, depth, guess, maximizing_color, table=None, limits=None):
+    """
+    Searches the root with a narrow window around the previous iteration's score, widening it on the side the
+    score fell out of until the score lies inside
+    :param board: the current board being used for the game (Board)
+    :param depth: controls how deep to search the tree of possible moves (int)
+    :param guess: score of the previous iteration, or None to search with a full window (int)
+    :param maximizing_color: color of the AI using this function to determine a move (tuple)
+    :param table: transposition table to use, defaults to the shared TABLE (TranspositionTable)
+    :param limits: time or node budget of the search, unlimited if None (SearchLimits)
     :return: tuple representing move and eval; format: (move, eval)
     """
-    pass    # YOUR CODE GOES HERE # DELETE THIS LINE #
+    if guess is None or not ASPIRATION_WINDOW or abs(guess) >= CHECKMATE:
+        return minimax(board, depth, -inf, inf, True, maximizing_color, table, limits)
+
+    lower = upper = ASPIRATION_WINDOW
+    while True:
+        alpha = guess - lower if lower < CHECKMATE else -inf
+        beta = guess + upper if upper < CHECKMATE else inf
+        move, score = minimax(board, depth, alpha, beta, True, maximizing_color, table, limits)
+        if score <= alpha:
+            lower *= 4
+            if limits is not None:
+                limits.fail_lows += 1
+        elif score >= beta:
+            upper *= 4
+            if limits is not None:
+                limits.fail_highs += 1
+        else:
+            return move, score
+
+
+def iterative_deepening(board, maximizing_color, time_limit=None, max_nodes=None, max_depth=MAX_DEPTH, table=None,
+                        parallel=None, stop=None, limits=None):
+    """
+    Searches depth 1, 2, 3... until the time or node budget runs out
+    :param board: the current board being used for the game; left unchanged (Board)
+    :param maximizing_color: color of the AI using this function to determine a move (tuple)
+    :param time_limit: number of seconds the search may take (float)
+    :param max_nodes: number of nodes the search may visit (int)
+    :param max_depth: deepest iteration to start (int)
+    :param table: transposition table to use, defaults to the shared TABLE (TranspositionTable)
+    :param parallel: searches each iteration on a process pool if given; max_nodes and table don't apply (ParallelSearch)
+    :param stop: cancels the search when set from another thread; checked at every node (threading.Event)
+    :param limits: budget of the search, whose counters are left for the caller to read; replaces time_limit,
+        max_nodes and stop if given (SearchLimits)
+    :return: tuple representing move, eval and depth of the deepest completed iteration; format: (move, eval, depth)
+    """
+    if limits is None:
+        deadline = None
+        if time_limit is not None:
+            deadline = time.monotonic() + time_limit
+        limits = SearchLimits(deadline, max_nodes, stop)
+    deadline = limits.deadline
+    stop = limits.stop
+
+    # Always have a move ready, even if not a single iteration completes
+    moves = board.get_moves()
+    if not moves:
+        return None, evaluate(board, maximizing_color), 0
+    best = (moves[0], evaluate(board, maximizing_color))
+    if len(moves) == 1:
+        return best[0], best[1], 0
+
+    ply = len(board.past_moves)
+    completed = 0
+    for depth in range(1, max_depth + 1):
+        try:
+            if parallel is None:
+                best = aspiration_search(board, depth, best[1] if completed else None, maximizing_color, table,
+                                         limits)
+            else:
+                best = parallel.search(board, depth, maximizing_color, deadline, best[0], stop)
+        except SearchTimeout:
+            # Undo the moves the interrupted search left on the board
+            while len(board.past_moves) > ply:
+                board.unmake_move()
+            break
+        completed = depth
+
+        # No point searching deeper once a forced mate has been found
+        if abs(best[1]) >= CHECKMATE:
+            break
+
+    return best[0], best[1], completed
+
+
+class Ponder:
+
+    def __init__(self, board, maximizing_color, table=None):
+        """
+        Searches the AI's answers to every reply of the opponent while the opponent is thinking. Replies are
+        searched with iterative deepening, the most likely reply first, and the results (as well as the
+        transposition table) are reused once the opponent has moved. run() is called by whoever runs the AI's
+        searches and returns once stop is set
+        :param board: copy of the board with the opponent to move; owned by the search while pondering (Board)
+        :param maximizing_color: color of the AI (tuple)
+        :param table: transposition table to use, defaults to the shared TABLE (TranspositionTable)
+        """
+        self.board = board
+        self.maximizing_color = maximizing_color
+        self.table = table
+        self.stop = threading.Event()
+
+        # Maps the hash of the position after each reply to (move, eval, depth)
+        self.results = {}
+
+    def run(self):
+        """
+        Searches every reply one depth deeper at a time until stopped
+        :return: None
+        """
+        board = self.board
+        limits = SearchLimits(stop=self.stop)
+        replies = []
+        for reply in board.get_moves():
+            board.make_move(reply)
+            board.next_turn()
+            replies.append((reply, board.hash))
+            board.unmake_move()
+
+        ply = len(board.past_moves)
+        try:
+            for depth in range(1, MAX_DEPTH + 1):
+                for reply, key in replies:
+                    board.make_move(reply)
+                    board.next_turn()
+                    move, score = minimax(board, depth, -inf, inf, True, self.maximizing_color, self.table, limits)
+                    self.results[key] = (move, score, depth)
+                    board.unmake_move()
+
+                # The opponent most likely plays the reply that is worst for the AI
+                replies.sort(key=lambda r: self.results[r[1]][1])
+        except SearchTimeout:
+            while len(board.past_moves) > ply:
+                board.unmake_move()
+
+    def finish(self, board):
+        """
+        Stops pondering and returns what was found for the opponent's actual reply; call it from the thread
+        that ran run(), once run() has returned
+        :param board: the current board, after the opponent's reply (Board)
+        :return: tuple of (move, eval, depth) on a ponder hit, otherwise None
+        """
+        self.stop.set()
+        return self.results.get(board.hash)
@@ -0,0 +1,565 @@
+from piece import *
+from encoding import *
+import evaluation
+import zobrist
+
+# Piece type indices, in the same order as Piece.image
+KING, QUEEN, BISHOP, KNIGHT, ROOK, PAWN = range(6)
+PIECE_TYPES = (King, Queen, Bishop, Knight, Rook, Pawn)
+COLORS = (WHITE, BLACK)
+
+# Squares are indexed by x * 8 + y (SQUARE_COORDS), the same as Zobrist keys and packed moves, so moving
+# along x is +-8 and along y is +-1
+
+
+def _square_mask(x, y):
+    if 0 <= x < 8 and 0 <= y < 8:
+        return 1 << (x * 8 + y)
+    return 0
+
+
+def _offset_table(offsets):
+    return [sum(_square_mask(x + dx, y + dy) for dx, dy in offsets) for x, y in SQUARE_COORDS]
+
+
+def _ray_table(dx, dy):
+    table = []
+    for x, y in SQUARE_COORDS:
+        mask = 0
+        nx, ny = x + dx, y + dy
+        while 0 <= nx < 8 and 0 <= ny < 8:
+            mask |= _square_mask(nx, ny)
+            nx += dx
+            ny += dy
+        table.append(mask)
+    return table
+
+
+# Attack masks per square; the _BB suffix keeps them apart from the coordinate tables in piece.py
+KNIGHT_ATTACKS_BB = _offset_table(((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)))
+KING_ATTACKS_BB = _offset_table(((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1)))
+
+# Indexed by 0 for pawns moving up the board (the player's) and 1 for pawns moving down (the opponent's)
+PAWN_ATTACKS_BB = (_offset_table(((-1, -1), (1, -1))), _offset_table(((-1, 1), (1, 1))))
+PAWN_STEP = (-1, 1)
+PAWN_START_Y = (6, 1)
+PAWN_PROMOTION_Y = (0, 7)
+
+# Value of BitBoard._gameover while the status of the position hasn't been computed
+_UNKNOWN = object()
+
+# Squares with the given y coordinate
+RANK_MASKS = [sum(1 << (x * 8 + y) for x in range(8)) for y in range(8)]
+
+# Rays per direction as (increasing, rays); on an increasing ray the nearest blocker is the lowest set bit
+ROOK_RAYS_BB = [(dx * 8 + dy > 0, _ray_table(dx, dy)) for dx, dy in ((0, -1), (0, 1), (-1, 0), (1, 0))]
+BISHOP_RAYS_BB = [(dx * 8 + dy > 0, _ray_table(dx, dy)) for dx, dy in ((-1, -1), (1, -1), (-1, 1), (1, 1))]
+
+
+def _by_code(tables):
+    return {player: [tables[player][PIECE_TYPES[code % 6], COLORS[code // 6]] for code in range(12)]
+            for player in COLORS}
+
+
+# Piece-square scores indexed [player][color * 6 + type][sq], see evaluation.py
+OPENING_BY_CODE = _by_code(evaluation.OPENING)
+ENDGAME_BY_CODE = _by_code(evaluation.ENDGAME)
+PHASE_BY_TYPE = [evaluation.PHASE_WEIGHTS[piece_type] for piece_type in PIECE_TYPES]
+
+
+def slider_attacks(sq, occupied, rays):
+    """
+    Returns the squares a sliding piece attacks along the given rays, up to and including the first blocker
+    :param sq: square of the piece (int)
+    :param occupied: bitboard of all pieces (int)
+    :param rays: ROOK_RAYS_BB or BISHOP_RAYS_BB (list)
+    :return: bitboard (int)
+    """
+    attacks = 0
+    for increasing, table in rays:
+        ray = table[sq]
+        blockers = ray & occupied
+        if blockers:
+            if increasing:
+                blocker = (blockers & -blockers).bit_length() - 1
+            else:
+                blocker = blockers.bit_length() - 1
+            ray ^= table[blocker]
+        attacks |= ray
+    return attacks
+
+
+class BitBoard:
+
+    def __init__(self, player_color):
+        """
+        Compact position used by the AI: one bitboard per piece type and color plus occupancy masks.
+        Offers the same interface minimax uses on Board (get_moves, make_move, next_turn, unmake_move,
+        in_check, hash, scores and gameover), with the same coordinates and Zobrist hashes
+        :param player_color: color of the player at the bottom of the board (tuple)
+        """
+        self.player = player_color
+        self.turn = WHITE
+        self.pieces = [[0] * 6, [0] * 6]
+        self.occupied = [0, 0]
+
+        # Piece on each square as color * 6 + type, or -1 if empty
+        self.squares = [-1] * 64
+
+        self.weights = [0] * 6
+        self.whiteScore = 0
+        self.blackScore = 0
+        self.opening_score = 0
+        self.endgame_score = 0
+        self.phase = 0
+        self.gameover = None
+        self.hash = 0
+        self.past_moves = []
+
+    @classmethod
+    def from_board(cls, board):
+        """
+        Creates a bitboard position from a Board
+        :param board: board to convert (Board)
+        :return: BitBoard
+        """
+        position = cls(board.player)
+        position.turn = board.turn
+        position.weights = [board.weights[piece_type] for piece_type in PIECE_TYPES]
+        position.whiteScore = board.whiteScore
+        position.blackScore = board.blackScore
+        position.opening_score = board.opening_score
+        position.endgame_score = board.endgame_score
+        position.phase = board.phase
+        position.gameover = board.gameover
+        position.hash = board.hash
+        for x in range(8):
+            for y in range(8):
+                piece = board.tilemap[x][y].piece
+                if piece:
+                    position.put(COLORS.index(piece.color), PIECE_TYPES.index(type(piece)), x * 8 + y)
+        return position
+
+    def to_board(self):
+        """
+        Creates a Board with the same position
+        :return: Board
+        """
+        from board import Board
+
+        board = Board(self.player)
+        for sq, code in enumerate(self.squares):
+            if code >= 0:
+                x, y = SQUARE_COORDS[sq]
+                color_index, type_index = divmod(code, 6)
+                piece = PIECE_TYPES[type_index](x, y, COLORS[color_index])
+                if type_index == PAWN:
+                    piece.firstMove = y == PAWN_START_Y[self.pawn_direction(color_index)]
+                board.tilemap[x][y].piece = piece
+                if type_index == KING:
+                    if color_index == 1:
+                        board.blackKingCoords = (x, y)
+                    else:
+                        board.whiteKingCoords = (x, y)
+        board.turn = self.turn
+        board.bottomPlayerTurn = self.turn == self.player
+        board.whiteScore = self.whiteScore
+        board.blackScore = self.blackScore
+        board.gameover = self.gameover
+        board.hash = self.hash
+        board.index_pieces()
+        return board
+
+    def copy(self):
+        """
+        Creates a copy of the current position, without move history
+        :return: reference to a new BitBoard object
+        """
+        copy = BitBoard(self.player)
+        copy.turn = self.turn
+        copy.pieces = [list(self.pieces[0]), list(self.pieces[1])]
+        copy.occupied = list(self.occupied)
+        copy.squares = list(self.squares)
+        copy.weights = self.weights
+        copy.whiteScore = self.whiteScore
+        copy.blackScore = self.blackScore
+        copy.opening_score = self.opening_score
+        copy.endgame_score = self.endgame_score
+        copy.phase = self.phase
+        copy._gameover = self._gameover
+        copy.hash = self.hash
+        return copy
+
+    def put(self, color_index, type_index, sq):
+        """
+        Places a piece on an empty square; doesn't update hash or scores
+        :return: None
+        """
+        bit = 1 << sq
+        self.pieces[color_index][type_index] |= bit
+        self.occupied[color_index] |= bit
+        self.squares[sq] = color_index * 6 + type_index
+
+    @property
+    def gameover(self):
+        """
+        Status of the position, computed the first time it is asked for after a move. Only insufficient material
+        is detected here; minimax finds checkmate and stalemate itself when there are no moves
+        :return: ("Insufficient Material", None), the status the position was created with, or None
+        """
+        if self._gameover is _UNKNOWN:
+            self._gameover = None
+            self.insufficient_material()
+        return self._gameover
+
+    @gameover.setter
+    def gameover(self, status):
+        self._gameover = status
+
+    def type_at(self, sq):
+        """
+        Returns the type of the piece on a square
+        :param sq: square index x * 8 + y (int)
+        :return: Piece subclass, or None if the square is empty
+        """
+        code = self.squares[sq]
+        return PIECE_TYPES[code % 6] if code >= 0 else None
+
+    def pawn_direction(self, color_index):
+        """
+        Returns 0 if pawns of the color move up the board (the player's), 1 if they move down
+        :return: int
+        """
+        return 0 if COLORS[color_index] == self.player else 1
+
+    def attacked(self, sq, by, occupied, ignore=0):
+        """
+        Returns True if the square is attacked by pieces of color index by
+        :param sq: square to check (int)
+        :param by: color index of the attackers (int)
+        :param occupied: bitboard of all pieces, which may differ from the actual one while testing a move (int)
+        :param ignore: bitboard of attackers to leave out, e.g. a piece that is being captured (int)
+        :return: bool
+        """
+        pieces = self.pieces[by]
+        if KNIGHT_ATTACKS_BB[sq] & pieces[KNIGHT] & ~ignore:
+            return True
+        if KING_ATTACKS_BB[sq] & pieces[KING]:
+            return True
+
+        # A pawn attacks sq if a pawn of the other direction standing on sq would attack the pawn
+        if PAWN_ATTACKS_BB[1 - self.pawn_direction(by)][sq] & pieces[PAWN] & ~ignore:
+            return True
+
+        queens = pieces[QUEEN]
+        if slider_attacks(sq, occupied, ROOK_RAYS_BB) & (pieces[ROOK] | queens) & ~ignore:
+            return True
+        if slider_attacks(sq, occupied, BISHOP_RAYS_BB) & (pieces[BISHOP] | queens) & ~ignore:
+            return True
+        return False
+
+    def attackers(self, sq, occupied):
+        """
+        Returns the pieces of both colors that attack a square
+        :param sq: square to check (int)
+        :param occupied: bitboard of all pieces, which may differ from the actual one during an exchange (int)
+        :return: bitboard (int)
+        """
+        white, black = self.pieces
+        rooks = white[ROOK] | black[ROOK] | white[QUEEN] | black[QUEEN]
+        bishops = white[BISHOP] | black[BISHOP] | white[QUEEN] | black[QUEEN]
+        attackers = (KNIGHT_ATTACKS_BB[sq] & (white[KNIGHT] | black[KNIGHT])) \
+            | (KING_ATTACKS_BB[sq] & (white[KING] | black[KING])) \
+            | (PAWN_ATTACKS_BB[1 - self.pawn_direction(0)][sq] & white[PAWN]) \
+            | (PAWN_ATTACKS_BB[1 - self.pawn_direction(1)][sq] & black[PAWN]) \
+            | (slider_attacks(sq, occupied, ROOK_RAYS_BB) & rooks) \
+            | (slider_attacks(sq, occupied, BISHOP_RAYS_BB) & bishops)
+        return attackers & occupied
+
+    def see(self, move):
+        """
+        Static exchange evaluation: resolves the sequence of captures on the destination square, each side
+        recapturing with its least valuable piece and free to stop when recapturing would lose material
+        :param move: packed capture or promotion (int)
+        :return: material the mover gains in centipawns; negative if the capture loses material (int)
+        """
+        from_sq = move & SQUARE_MASK
+        to_sq = move >> DEST_SHIFT & SQUARE_MASK
+        weights = self.weights
+        side, type_index = divmod(self.squares[from_sq], 6)
+        captured = self.squares[to_sq]
+
+        # gains[d] is what the side making capture d wins if the exchange stops after it
+        gains = [weights[captured % 6] if captured >= 0 else 0]
+        on_square = weights[type_index]
+        if move & PROMOTION_MASK:
+            gains[0] += weights[QUEEN] - weights[PAWN]
+            on_square = weights[QUEEN]
+
+        occupied = (self.occupied[0] | self.occupied[1]) ^ (1 << from_sq)
+        attackers = self.attackers(to_sq, occupied)
+        while True:
+            side = 1 - side
+            candidates = attackers & self.occupied[side]
+            if not candidates:
+                break
+
+            # Recapture with the least valuable attacker
+            for type_index in (PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING):
+                bb = candidates & self.pieces[side][type_index]
+                if bb:
+                    break
+            gains.append(on_square - gains[-1])
+            on_square = weights[type_index]
+
+            # Removing the attacker may uncover a slider behind it
+            occupied ^= bb & -bb
+            attackers = self.attackers(to_sq, occupied)
+
+        # Either side can stop capturing when continuing would cost it material
+        for depth in range(len(gains) - 1, 0, -1):
+            gains[depth - 1] = -max(-gains[depth - 1], gains[depth])
+        return gains[0]
+
+    def in_check(self, color) -> bool:
+        """
+        Returns True if player of specified color is in check
+        :param color: color of player to check (tuple)
+        :return: bool
+        """
+        us = COLORS.index(color)
+        king = self.pieces[us][KING]
+        return self.attacked(king.bit_length() - 1, 1 - us, self.occupied[0] | self.occupied[1])
+
+    def is_legal(self, source, dest):
+        """
+        Returns True if the pseudo-legal move from source to dest doesn't leave the mover's king attacked
+        :param source: square moved from (int)
+        :param dest: square moved to (int)
+        :return: bool
+        """
+        us, type_index = divmod(self.squares[source], 6)
+        dest_bit = 1 << dest
+        occupied = ((self.occupied[0] | self.occupied[1]) & ~(1 << source)) | dest_bit
+        if type_index == KING:
+            king = dest
+        else:
+            king = self.pieces[us][KING].bit_length() - 1
+        return not self.attacked(king, 1 - us, occupied, dest_bit)
+
+    def get_moves(self, captures_only=False):
+        """
+        Returns a list of the legal moves for the current player, captures first
+        :param captures_only: only return captures and promotions, as used by quiescence search (bool)
+        :return: list of packed moves (see encoding.py)
+        """
+        us = COLORS.index(self.turn)
+        pieces = self.pieces[us]
+        own = self.occupied[us]
+        enemy = self.occupied[1 - us]
+        occupied = own | enemy
+        direction = self.pawn_direction(us)
+        promotion_rank = PAWN_PROMOTION_Y[direction]
+        targets = []
+
+        # Squares pieces and pawns may move to
+        if captures_only:
+            piece_mask = enemy
+            pawn_mask = enemy | RANK_MASKS[promotion_rank]
+        else:
+            piece_mask = pawn_mask = ~own
+
+        for type_index in (KING, QUEEN, BISHOP, KNIGHT, ROOK):
+            bb = pieces[type_index]
+            while bb:
+                low = bb & -bb
+                bb ^= low
+                sq = low.bit_length() - 1
+                if type_index == KNIGHT:
+                    attacks = KNIGHT_ATTACKS_BB[sq]
+                elif type_index == KING:
+                    attacks = KING_ATTACKS_BB[sq]
+                elif type_index == ROOK:
+                    attacks = slider_attacks(sq, occupied, ROOK_RAYS_BB)
+                elif type_index == BISHOP:
+                    attacks = slider_attacks(sq, occupied, BISHOP_RAYS_BB)
+                else:
+                    attacks = slider_attacks(sq, occupied, ROOK_RAYS_BB) | slider_attacks(sq, occupied, BISHOP_RAYS_BB)
+                targets.append((sq, attacks & piece_mask))
+
+        step = PAWN_STEP[direction]
+        bb = pieces[PAWN]
+        while bb:
+            low = bb & -bb
+            bb ^= low
+            sq = low.bit_length() - 1
+            attacks = PAWN_ATTACKS_BB[direction][sq] & enemy
+            if not occupied >> (sq + step) & 1:
+                attacks |= 1 << (sq + step)
+                if sq % 8 == PAWN_START_Y[direction] and not occupied >> (sq + 2 * step) & 1:
+                    attacks |= 1 << (sq + 2 * step)
+            targets.append((sq, attacks & pawn_mask))
+
+        # Out of check, only the king and pieces on a line with it (possibly pinned) need a legality test
+        king = pieces[KING].bit_length() - 1
+        if self.attacked(king, 1 - us, occupied):
+            suspects = ~0
+        else:
+            suspects = (slider_attacks(king, occupied, ROOK_RAYS_BB) | slider_attacks(king, occupied, BISHOP_RAYS_BB)
+                        | (1 << king)) & own
+
+        captures = []
+        quiets = []
+        for sq, attacks in targets:
+            test = suspects >> sq & 1
+            pawn = self.squares[sq] % 6 == PAWN
+            while attacks:
+                low = attacks & -attacks
+                attacks ^= low
+                dest = low.bit_length() - 1
+                if not test or self.is_legal(sq, dest):
+                    move = sq | dest << DEST_SHIFT
+                    if pawn and dest % 8 == promotion_rank:
+                        move |= PROMOTE_QUEEN
+                    if low & enemy:
+                        captures.append(move | CAPTURE)
+                    else:
+                        quiets.append(move)
+        return captures + quiets
+
+    def make_move(self, move):
+        """
+        Moves piece from source coords to dest coords and makes necessary updates to game state
+        :param move: packed move, see encoding.py (int)
+        :return: None
+        """
+        from_sq = move & SQUARE_MASK
+        to_sq = move >> DEST_SHIFT & SQUARE_MASK
+        code = self.squares[from_sq]
+        captured = self.squares[to_sq]
+        self.past_moves.append((from_sq, to_sq, code, captured, self.whiteScore, self.blackScore,
+                                self.opening_score, self.endgame_score, self.phase, self.hash, self._gameover))
+        opening = OPENING_BY_CODE[self.player]
+        endgame = ENDGAME_BY_CODE[self.player]
+
+        us, type_index = divmod(code, 6)
+        from_bit = 1 << from_sq
+        to_bit = 1 << to_sq
+        color = COLORS[us]
+
+        # Remove captured piece
+        if captured >= 0:
+            them, captured_type = divmod(captured, 6)
+            self.pieces[them][captured_type] ^= to_bit
+            self.occupied[them] ^= to_bit
+            self.hash ^= zobrist.PIECE_KEYS[PIECE_TYPES[captured_type], COLORS[them]][to_sq]
+            if them == 1:
+                self.blackScore -= self.weights[captured_type]
+            else:
+                self.whiteScore -= self.weights[captured_type]
+            self.opening_score -= opening[captured][to_sq]
+            self.endgame_score -= endgame[captured][to_sq]
+            self.phase -= PHASE_BY_TYPE[captured_type]
+
+        # Move piece, promoting pawns that reach the last rank
+        new_type = type_index
+        if type_index == PAWN and to_sq % 8 == PAWN_PROMOTION_Y[self.pawn_direction(us)]:
+            new_type = QUEEN
+            if us == 1:
+                self.blackScore += self.weights[QUEEN] - self.weights[PAWN]
+            else:
+                self.whiteScore += self.weights[QUEEN] - self.weights[PAWN]
+            self.phase += PHASE_BY_TYPE[QUEEN]
+        new_code = us * 6 + new_type
+        self.opening_score += opening[new_code][to_sq] - opening[code][from_sq]
+        self.endgame_score += endgame[new_code][to_sq] - endgame[code][from_sq]
+        self.pieces[us][type_index] ^= from_bit
+        self.pieces[us][new_type] ^= to_bit
+        self.occupied[us] ^= from_bit | to_bit
+        self.squares[from_sq] = -1
+        self.squares[to_sq] = new_code
+        self.hash ^= zobrist.PIECE_KEYS[PIECE_TYPES[type_index], color][from_sq] \
+            ^ zobrist.PIECE_KEYS[PIECE_TYPES[new_type], color][to_sq]
+
+        # Material is checked when gameover is next asked for
+        self._gameover = _UNKNOWN
+
+    def make_null_move(self):
+        """
+        Passes the turn without moving, as used by null-move pruning; undone by unmake_move
+        :return: None
+        """
+        self.past_moves.append(None)
+        self.next_turn()
+
+    def unmake_move(self):
+        """
+        Undoes previous move; restores game state
+        :return: None
+        """
+        if self.past_moves[-1] is None:
+            self.past_moves.pop()
+            self.next_turn()
+            return
+
+        from_sq, to_sq, code, captured, self.whiteScore, self.blackScore, self.opening_score, self.endgame_score, \
+            self.phase, self.hash, self._gameover = self.past_moves.pop()
+        us, type_index = divmod(code, 6)
+        from_bit = 1 << from_sq
+        to_bit = 1 << to_sq
+
+        moved_type = self.squares[to_sq] % 6
+        self.pieces[us][moved_type] ^= to_bit
+        self.pieces[us][type_index] ^= from_bit
+        self.occupied[us] ^= from_bit | to_bit
+        self.squares[from_sq] = code
+        self.squares[to_sq] = captured
+        if captured >= 0:
+            them, captured_type = divmod(captured, 6)
+            self.pieces[them][captured_type] |= to_bit
+            self.occupied[them] |= to_bit
+
+        # The restored hash already has the mover's turn in it
+        self.turn = COLORS[us]
+
+    def next_turn(self) -> None:
+        """
+        Switches turn of board to the other player
+        :return: None
+        """
+        self.turn = BLACK if self.turn == WHITE else WHITE
+        self.hash ^= zobrist.BLACK_TO_MOVE
+
+    def non_pawn_material(self, color) -> bool:
+        """
+        Returns True if the player of specified color has a piece besides the king and pawns
+        :param color: color of player to check (tuple)
+        :return: bool
+        """
+        pieces = self.pieces[COLORS.index(color)]
+        return bool(pieces[QUEEN] | pieces[ROOK] | pieces[BISHOP] | pieces[KNIGHT])
+
+    def insufficient_material(self):
+        """
+        Sets gameover if neither side can mate; same rules as Board.insufficient_material
+        :return: None
+        """
+        white, black = self.pieces
+        if white[QUEEN] or black[QUEEN]:
+            return
+        wknight = bin(white[KNIGHT]).count("1")
+        bknight = bin(black[KNIGHT]).count("1")
+        wminor = bin(white[BISHOP] | white[ROOK] | white[PAWN]).count("1")
+        bminor = bin(black[BISHOP] | black[ROOK] | black[PAWN]).count("1")
+        kings = bin(white[KING] | black[KING]).count("1")
+        if kings != 2:
+            return
+
+        if wminor == bminor == wknight == bknight == 0:
+            self.gameover = ("Insufficient Material", None)
+        elif ((wminor == 1 and bminor == 0) or (bminor == 1 and wminor == 0)) and bknight == wknight == 0:
+            self.gameover = ("Insufficient Material", None)
+        elif (wknight == 2 or bknight == 2) and wminor == bminor == 0:
+            self.gameover = ("Insufficient Material", None)
+        elif (wminor == 1 and bminor == 0) or (bminor == 1 and wminor == 0):
+            self.gameover = ("Insufficient Material", None)
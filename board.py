@@ -1,8 +1,20 @@
 from piece import *
 from tile import *
 from settings import *
+from encoding import *
+from ordering import mvv_lva
 
-import AI
+import evaluation
+import zobrist
+
+# Piece types by FEN letter (upper case is white, lower case is black)
+FEN_PIECES = {"k": King, "q": Queen, "b": Bishop, "n": Knight, "r": Rook, "p": Pawn}
+
+# Cross-check the legal move generator against filtering every pseudo-legal move (slow, for debugging only)
+DEBUG_LEGALITY = False
+
+# Value of Board._gameover while the status of the position hasn't been computed
+_UNKNOWN = object()
 
 
 class Board:
@@ -21,12 +33,29 @@ class Board:
             self.bottomPlayerTurn = False
         self.gameover = None
 
-        self.weights = {King: 900, Queen: 90, Rook: 50, Bishop: 30, Knight: 30, Pawn: 10}
-        self.blackScore = 1290
-        self.whiteScore = 1290
+        # Material in centipawns
+        self.weights = evaluation.PIECE_VALUES
+        self.blackScore = 12900
+        self.whiteScore = 12900
+
+        # Piece-square scores from white's point of view and game phase, maintained by make_move and unmake_move
+        self.opening_score = 0
+        self.endgame_score = 0
+        self.phase = evaluation.MAX_PHASE
 
         self.past_moves = []
 
+        # Zobrist hash of the position, maintained incrementally by make_move and unmake_move
+        self.hash = 0
+
+        # Legal moves of the last position they were generated for; format: (hash, moves, destinations by source)
+        self._move_cache = (None, [], {})
+
+        # Live pieces of each color and number of pieces per (type, color), maintained by make_move and unmake_move
+        self.piece_lists = {WHITE: [], BLACK: []}
+        self.piece_counts = {(piece_type, color): 0 for piece_type in (King, Queen, Bishop, Knight, Rook, Pawn)
+                             for color in (WHITE, BLACK)}
+
     def print(self):
         print("\n-----------------------------------------")
         print("blackKingCoords:  ", self.blackKingCoords)
@@ -39,6 +68,7 @@ class Board:
         print("Gameover:         ", self.gameover)
         print("blackScore:       ", self.blackScore)
         print("whiteScore:       ", self.whiteScore)
+        print("Phase:            ", self.phase)
         print("-----------------------------------------")
 
     def initialize_pieces(self) -> None:
@@ -99,6 +129,114 @@ class Board:
                         else:
                             self.tilemap[x][y].piece.color = BLACK
 
+        self.hash = zobrist.hash_board(self)
+        self.index_pieces()
+
+    def index_pieces(self) -> None:
+        """
+        Rebuilds piece lists, piece counts and piece-square scores from the tiles
+        :return: None
+        """
+        self.piece_lists = {WHITE: [], BLACK: []}
+        for key in self.piece_counts:
+            self.piece_counts[key] = 0
+        for x in range(8):
+            for y in range(8):
+                piece = self.tilemap[x][y].piece
+                if piece:
+                    self.piece_lists[piece.color].append(piece)
+                    self.piece_counts[type(piece), piece.color] += 1
+        self.opening_score, self.endgame_score, self.phase = evaluation.score_board(self)
+
+    def load_fen(self, fen) -> None:
+        """
+        Places pieces as described by a FEN string; castling and en passant fields are ignored since the
+        game doesn't support them
+        :param fen: position in Forsyth-Edwards Notation (str)
+        :return: None
+        """
+        fields = fen.split()
+
+        # Remove all pieces from board
+        for x in range(8):
+            for y in range(8):
+                self.tilemap[x][y].piece = None
+
+        self.blackScore = 0
+        self.whiteScore = 0
+        for rank_index, rank in enumerate(fields[0].split("/")):
+            file = 0
+            for char in rank:
+                if char.isdigit():
+                    file += int(char)
+                    continue
+                x, y = self.square_coords("abcdefgh"[file] + str(8 - rank_index))
+                color = WHITE if char.isupper() else BLACK
+                piece = FEN_PIECES[char.lower()](x, y, color)
+
+                # Pawns can only move two tiles from their starting rank
+                if type(piece) is Pawn:
+                    piece.firstMove = rank_index == (6 if color == WHITE else 1)
+
+                self.tilemap[x][y].piece = piece
+                if type(piece) is King:
+                    if color == BLACK:
+                        self.blackKingCoords = (x, y)
+                    else:
+                        self.whiteKingCoords = (x, y)
+                if color == BLACK:
+                    self.blackScore += self.weights[type(piece)]
+                else:
+                    self.whiteScore += self.weights[type(piece)]
+                file += 1
+
+        self.turn = BLACK if len(fields) > 1 and fields[1] == "b" else WHITE
+        self.bottomPlayerTurn = self.turn == self.player
+        self.selected = None
+        self._gameover = _UNKNOWN
+        self.past_moves = []
+        self.hash = zobrist.hash_board(self)
+        self.index_pieces()
+
+    @property
+    def gameover(self):
+        """
+        Status of the position for the player to move, computed the first time it is asked for after a move
+        :return: ("Checkmate", winning color), ("Stalemate", None), ("Insufficient Material", None) or None
+        """
+        if self._gameover is _UNKNOWN:
+            self._gameover = None
+            self.insufficient_material()
+            if self._gameover is None:
+                self.checkmate_stalemate()
+        return self._gameover
+
+    @gameover.setter
+    def gameover(self, status):
+        self._gameover = status
+
+    def square_coords(self, square):
+        """
+        Converts a square name such as "e4" to grid coordinates, taking the side the player sits on into account
+        :param square: name of square (str)
+        :return: tuple
+        """
+        file = "abcdefgh".index(square[0])
+        rank = int(square[1])
+        if self.player == BLACK:
+            return 7 - file, rank - 1
+        return file, 8 - rank
+
+    def square_name(self, coords):
+        """
+        Converts grid coordinates to a square name such as "e4", taking the side the player sits on into account
+        :param coords: coords to convert (tuple)
+        :return: str
+        """
+        if self.player == BLACK:
+            return "abcdefgh"[7 - coords[0]] + str(coords[1] + 1)
+        return "abcdefgh"[coords[0]] + str(8 - coords[1])
+
     def initialize_tiles(self) -> None:
         """
         Initializes the tile grid for the chess board
@@ -118,48 +256,19 @@ class Board:
                 cnt += 1
             cnt += 1
 
-    def draw(self) -> None:
-        """
-        Draws all components of the board
-        :return: None
-        """
-
-        # Draw tiles and pieces
-        for row in self.tilemap:
-            for tile in row:
-                tile.draw()
-
-        # Draw circles to indicate valid move locations
-        if self.selected:
-            moves = self.selected.piece.valid_moves(self)  # + self.can_castle(self.selected.piece.color)
-            for move in moves:
-                if not self.in_check_after_move((self.selected.piece.x, self.selected.piece.y),
-                                                move, self.selected.piece.color):
-                    tup = to_coords(move[0], move[1])
-                    x = tup[0] + int(TILE_SIZE / 2)
-                    y = tup[1] + int(TILE_SIZE / 2)
-                    tup2 = x, y
-                    pygame.draw.circle(SCREEN, LARGE_TEXT_COLOR, tup2, 10)
-
-    def select(self) -> None:
+    def select(self, coords) -> None:
         """
-        Selects tile that contains the mouse pointer if tile is valid
+        Selects tile at the given grid coordinates if tile is valid
+        :param coords: grid coordinates of the tile that was clicked, may be out of bounds (tuple)
         :return: None
         """
-
-        # Get position of mouse
-        pos = pygame.mouse.get_pos()
-
-        # Get coordinates of top left corner of selected tile
-        x = (pos[0] - BOARD_X) // TILE_SIZE
-        y = (pos[1] - BOARD_Y) // TILE_SIZE
-        coords = x, y
+        x, y = coords
 
         # Player can only move their own pieces
         if self.player != self.turn:
             return
 
-        # If mouse position is out of bounds, de-select current tile (if applicable) and restore its color
+        # If coordinates are out of bounds, de-select current tile (if applicable) and restore its color
         if not self.in_bounds(coords):
             if self.selected:
                 self.selected.fill(self.selected.color)
@@ -167,11 +276,9 @@ class Board:
             return
 
         # If a piece is already selected, make move to selected tile
-        if self.selected and coords in self.selected.piece.valid_moves(self) \
-                and not self.in_check_after_move((self.selected.piece.x, self.selected.piece.y), coords,
-                                                 self.selected.piece.color):
+        if self.selected and coords in self.moves_from((self.selected.piece.x, self.selected.piece.y)):
             #self.move_piece((self.selected.x, self.selected.y), (x, y))
-            self.make_move((self.selected.x, self.selected.y), (x, y))
+            self.make_move(encode_move((self.selected.x, self.selected.y), (x, y)))
             self.selected = None
             self.next_turn()
             return
@@ -202,10 +309,12 @@ class Board:
         copy.turn = self.turn
         copy.bottomPlayerTurn = self.bottomPlayerTurn
         copy.player = self.player
-        copy.gameover = self.gameover
+        copy._gameover = self._gameover
         copy.weights = self.weights
         copy.blackScore = self.blackScore
         copy.whiteScore = self.whiteScore
+        copy.hash = self.hash
+        copy.index_pieces()
         return copy
 
     @staticmethod
@@ -229,6 +338,26 @@ class Board:
             return False
         return True
 
+    def type_at(self, sq):
+        """
+        Returns the type of the piece on a square
+        :param sq: square index x * 8 + y (int)
+        :return: Piece subclass, or None if the square is empty
+        """
+        piece = self.tilemap[sq >> 3][sq & 7].piece
+        return type(piece) if piece else None
+
+    def see(self, move):
+        """
+        Static exchange evaluation of a capture, see BitBoard.see; builds a bitboard of the position, so the
+        AI's searches, which run on a BitBoard, don't pay for this
+        :param move: packed capture or promotion (int)
+        :return: material the mover gains in centipawns; negative if the capture loses material (int)
+        """
+        from bitboard import BitBoard
+
+        return BitBoard.from_board(self).see(move)
+
     def enemy_at_coords(self, coords, color) -> bool:
         """
         Returns True if color of the piece at coords is not same as specified color
@@ -251,6 +380,41 @@ class Board:
             return True
         return False
 
+    def square_attacked(self, coords, color) -> bool:
+        """
+        Returns True if any piece of specified color attacks the tile at coords
+        :param coords: coords to be checked (tuple)
+        :param color: color of the attacking player (tuple)
+        :return: bool
+        """
+        x, y = coords
+        tilemap = self.tilemap
+
+        # Knights and kings
+        for targets, piece_type in ((KNIGHT_TARGETS[x][y], Knight), (KING_TARGETS[x][y], King)):
+            for nx, ny in targets:
+                piece = tilemap[nx][ny].piece
+                if piece and piece.color == color and type(piece) is piece_type:
+                    return True
+
+        # Pawns attack diagonally forward, so look diagonally backward from the tile
+        for nx, ny in PAWN_ATTACKS[1 if color == self.player else 0][x][y]:
+            piece = tilemap[nx][ny].piece
+            if piece and piece.color == color and type(piece) is Pawn:
+                return True
+
+        # Sliding pieces; follow each ray until the first piece
+        for rays, piece_type in ((ROOK_RAYS[x][y], Rook), (BISHOP_RAYS[x][y], Bishop)):
+            for ray in rays:
+                for nx, ny in ray:
+                    piece = tilemap[nx][ny].piece
+                    if piece:
+                        if piece.color == color and (type(piece) is piece_type or type(piece) is Queen):
+                            return True
+                        break
+
+        return False
+
     def in_check(self, color) -> bool:
         """
         Returns True if player of specified color is in check
@@ -258,19 +422,9 @@ class Board:
         :return: bool
         """
         if color == BLACK:
-            king_coords = self.blackKingCoords
+            return self.square_attacked(self.blackKingCoords, WHITE)
         else:
-            king_coords = self.whiteKingCoords
-
-        # Check if position of King is in any of the valid moves for opposite player
-        for x in range(8):
-            for y in range(8):
-                if self.enemy_at_coords((x, y), color):
-                    for move in self.tilemap[x][y].piece.valid_moves(self):
-                        if move[0] == king_coords[0] and move[1] == king_coords[1]:
-                            return True
-
-        return False
+            return self.square_attacked(self.whiteKingCoords, BLACK)
 
     def in_check_after_move(self, source, dest, color) -> bool:
         """
@@ -287,95 +441,262 @@ class Board:
         source_piece = source_tile.piece
         dest_piece = dest_tile.piece
 
-        # Preserve king coords
-        king_coords = None
+        # Find the square of the king after the move
         if type(source_piece) is King:
-            if color == BLACK:
-                king_coords = self.blackKingCoords
-            else:
-                king_coords = self.whiteKingCoords
+            king_coords = dest
+        elif color == BLACK:
+            king_coords = self.blackKingCoords
+        else:
+            king_coords = self.whiteKingCoords
 
-        # Move piece from source tile to dest tile
+        # Move piece from source tile to dest tile; piece coords are not needed for the probe
         dest_tile.piece = source_piece
-        dest_tile.piece.move(dest_tile.x, dest_tile.y)
         source_tile.piece = None
 
-        # Set king coords
-        if type(source_piece) is King:
-            if color == BLACK:
-                self.blackKingCoords = (dest_tile.piece.x, dest_tile.piece.y)
-            else:
-                self.whiteKingCoords = (dest_tile.piece.x, dest_tile.piece.y)
-
-        # Set player position
-        self.bottomPlayerTurn = not self.bottomPlayerTurn
-
-        # See if in check state after move
-        if self.in_check(color):
-            in_check = True
+        # See if king is attacked after move
+        if color == BLACK:
+            in_check = self.square_attacked(king_coords, WHITE)
         else:
-            in_check = False
-
-        # Restore king coords
-        if type(source_piece) is King:
-            if color == BLACK:
-                self.blackKingCoords = king_coords
-            else:
-                self.whiteKingCoords = king_coords
-
-        # Restore player position
-        self.bottomPlayerTurn = not self.bottomPlayerTurn
+            in_check = self.square_attacked(king_coords, BLACK)
 
         # Move piece back
         source_tile.piece = source_piece
         dest_tile.piece = dest_piece
-        source_tile.piece.move(source_tile.x, source_tile.y)
 
         return in_check
 
-    def make_move(self, source, dest):
+    def pins_and_checks(self, color):
+        """
+        Finds pieces of specified color that are pinned to their king and enemy pieces giving check
+        :param color: color of player whose king is looked at (tuple)
+        :return: tuple (pins, checkers, evasions); pins maps coords of each pinned piece to the set of coords
+                 it can move to without leaving the pin, checkers is a list of coords of checking pieces and
+                 evasions is the set of coords that capture or block a single checker
+        """
+        if color == BLACK:
+            kx, ky = self.blackKingCoords
+            enemy = WHITE
+        else:
+            kx, ky = self.whiteKingCoords
+            enemy = BLACK
+        tilemap = self.tilemap
+        pins = {}
+        checkers = []
+        evasions = set()
+
+        # Sliding pieces; a ray may pass through at most one friendly piece, which is then pinned
+        for rays, piece_type in ((ROOK_RAYS[kx][ky], Rook), (BISHOP_RAYS[kx][ky], Bishop)):
+            for ray in rays:
+                pinned = None
+                for i, (nx, ny) in enumerate(ray):
+                    piece = tilemap[nx][ny].piece
+                    if piece:
+                        if piece.color == color:
+                            if pinned:
+                                break
+                            pinned = (nx, ny)
+                        else:
+                            if type(piece) is piece_type or type(piece) is Queen:
+                                if pinned:
+                                    pins[pinned] = set(ray[:i + 1])
+                                else:
+                                    checkers.append((nx, ny))
+                                    evasions.update(ray[:i + 1])
+                            break
+
+        # Knights
+        for nx, ny in KNIGHT_TARGETS[kx][ky]:
+            piece = tilemap[nx][ny].piece
+            if piece and piece.color == enemy and type(piece) is Knight:
+                checkers.append((nx, ny))
+                evasions.add((nx, ny))
+
+        # Pawns
+        for nx, ny in PAWN_ATTACKS[1 if enemy == self.player else 0][kx][ky]:
+            piece = tilemap[nx][ny].piece
+            if piece and piece.color == enemy and type(piece) is Pawn:
+                checkers.append((nx, ny))
+                evasions.add((nx, ny))
+
+        return pins, checkers, evasions
+
+    def legal_destinations(self, coords, pins_and_checks=None):
+        """
+        Returns the coords the piece at coords can legally move to
+        :param coords: coords of the piece to move (tuple)
+        :param pins_and_checks: result of pins_and_checks for the piece's color, computed if None (tuple)
+        :return: list
+        """
+        piece = self.tilemap[coords[0]][coords[1]].piece
+        if pins_and_checks is None:
+            pins_and_checks = self.pins_and_checks(piece.color)
+        pins, checkers, evasions = pins_and_checks
+
+        # King can't move onto an attacked tile (the king itself is lifted, so it can't hide behind itself)
+        if type(piece) is King:
+            return [move for move in piece.valid_moves(self) if not self.in_check_after_move(coords, move, piece.color)]
+
+        # Only the king can escape a double check
+        if len(checkers) > 1:
+            return []
+
+        moves = piece.valid_moves(self)
+
+        # A single check must be captured or blocked
+        if checkers:
+            moves = [move for move in moves if move in evasions]
+
+        # A pinned piece must stay on the line between king and pinner
+        if coords in pins:
+            pin = pins[coords]
+            moves = [move for move in moves if move in pin]
+
+        return moves
+
+    def legal_moves(self):
+        """
+        Returns all legal moves for the current player, using pins and checks instead of trying every move
+        :return: list of packed moves (see encoding.py), captures first
+        """
+        context = self.pins_and_checks(self.turn)
+        promotion_y = 0 if self.bottomPlayerTurn else 7
+        tilemap = self.tilemap
+        captures = []
+        quiets = []
+        for piece in self.piece_lists[self.turn]:
+            source = (piece.x, piece.y)
+            base = piece.x * 8 + piece.y
+            pawn = type(piece) is Pawn
+            for x, y in self.legal_destinations(source, context):
+                move = base | (x * 8 + y) << DEST_SHIFT
+                if pawn and y == promotion_y:
+                    move |= PROMOTE_QUEEN
+                if tilemap[x][y].piece:
+                    captures.append(move | CAPTURE)
+                else:
+                    quiets.append(move)
+        moves = captures + quiets
+
+        if DEBUG_LEGALITY:
+            assert sorted(moves) == sorted(self.filtered_moves()), "legal move generator disagrees with filter"
+
+        return moves
+
+    def cached_moves(self):
+        """
+        Returns the legal moves for the current player, generating them at most once per position. The list is
+        shared, so callers must not modify it
+        :return: list of packed moves (see encoding.py), captures first
+        """
+        key, moves, _ = self._move_cache
+        if key != self.hash:
+            moves = self.legal_moves()
+            destinations = {}
+            for move in moves:
+                source, dest = decode_move(move)
+                destinations.setdefault(source, []).append(dest)
+            self._move_cache = (self.hash, moves, destinations)
+        return moves
+
+    def moves_from(self, coords):
+        """
+        Returns the coords the current player's piece at coords can legally move to, from the move cache
+        :param coords: coords of the piece to move (tuple)
+        :return: list
+        """
+        self.cached_moves()
+        return self._move_cache[2].get(coords, [])
+
+    def filtered_moves(self):
+        """
+        Returns all legal moves for the current player by filtering every pseudo-legal move through
+        in_check_after_move; slow, kept to cross-check legal_moves
+        :return: list of packed moves (see encoding.py)
+        """
+        promotion_y = 0 if self.bottomPlayerTurn else 7
+        moves = []
+        for piece in self.piece_lists[self.turn]:
+            source = (piece.x, piece.y)
+            for move in piece.valid_moves(self):
+                if not self.in_check_after_move(source, move, self.turn):
+                    promotion = PROMOTE_QUEEN if type(piece) is Pawn and move[1] == promotion_y else NO_PROMOTION
+                    moves.append(encode_move(source, move, promotion, self.piece_at_coords(move)))
+        return moves
+
+    def make_move(self, move):
         """
         Moves piece from source coords to dest coords and makes necessary updates to game state
-        :param source: coordinates of tile that piece is moving from (tuple)
-        :param dest: coordinates of tile that piece is moving to (tuple)
+        :param move: packed move, see encoding.py; use encode_move to make one from coordinates (int)
         :return: None
         """
+        source, dest = decode_move(move)
 
-        # Get shorthand for source and destination tiles
+        # Get shorthand for source and destination tiles and pieces
         source_tile = self.tilemap[source[0]][source[1]]
         dest_tile = self.tilemap[dest[0]][dest[1]]
-
-        # Store previous state to allow for unmaking move
-        previous_state = {"blackScore": self.blackScore,
-                          "whiteScore": self.whiteScore,
-                          "blackKingCoords": self.blackKingCoords,
-                          "whiteKingCoords": self.whiteKingCoords,
-                          "tile1": (source, source_tile.copy()),
-                          "tile2": (dest, dest_tile.copy()),
-                          "gameover": self.gameover
-                          }
-        self.past_moves.append(previous_state)
+        piece = source_tile.piece
+        captured = dest_tile.piece
+
+        # Remove captured piece from its piece list, remembering where it was so unmaking keeps the order
+        captured_index = None
+        if captured:
+            captured_list = self.piece_lists[captured.color]
+            captured_index = captured_list.index(captured)
+            del captured_list[captured_index]
+            self.piece_counts[type(captured), captured.color] -= 1
+
+        # Store previous state to allow for unmaking move; pieces are stored by reference, never copied
+        self.past_moves.append((source, dest, piece, captured, captured_index, piece.firstMove,
+                                self.blackScore, self.whiteScore, self.opening_score, self.endgame_score, self.phase,
+                                self.blackKingCoords, self.whiteKingCoords, self._gameover))
 
         # Update scores
-        if dest_tile.piece:
+        opening = evaluation.OPENING[self.player]
+        endgame = evaluation.ENDGAME[self.player]
+        from_sq = source[0] * 8 + source[1]
+        to_sq = dest[0] * 8 + dest[1]
+        if captured:
             if self.turn == WHITE:
-                self.blackScore -= self.weights[type(dest_tile.piece)]
+                self.blackScore -= self.weights[type(captured)]
             else:
-                self.whiteScore -= self.weights[type(dest_tile.piece)]
+                self.whiteScore -= self.weights[type(captured)]
+            key = type(captured), captured.color
+            self.opening_score -= opening[key][to_sq]
+            self.endgame_score -= endgame[key][to_sq]
+            self.phase -= evaluation.PHASE_WEIGHTS[type(captured)]
 
         # Promote piece if it meets requirements
-        if type(source_tile.piece) is Pawn:
+        moved = piece
+        if type(piece) is Pawn:
             if (self.bottomPlayerTurn and dest_tile.y == 0) or (not self.bottomPlayerTurn and dest_tile.y == 7):
-                source_tile.piece = Queen(source_tile.piece.x, source_tile.piece.y, source_tile.piece.color)
+                moved = Queen(piece.x, piece.y, piece.color)
+                piece_list = self.piece_lists[piece.color]
+                piece_list[piece_list.index(piece)] = moved
+                self.piece_counts[Pawn, piece.color] -= 1
+                self.piece_counts[Queen, piece.color] += 1
+                if piece.color == WHITE:
+                    self.whiteScore += self.weights[Queen] - self.weights[Pawn]
+                else:
+                    self.blackScore += self.weights[Queen] - self.weights[Pawn]
+                self.phase += evaluation.PHASE_WEIGHTS[Queen]
+        key = type(piece), piece.color
+        moved_key = type(moved), piece.color
+        self.opening_score += opening[moved_key][to_sq] - opening[key][from_sq]
+        self.endgame_score += endgame[moved_key][to_sq] - endgame[key][from_sq]
 
         # Move piece from source tile to dest tile
-        dest_tile.piece = source_tile.piece
-        source_tile.piece.move(dest_tile.x, dest_tile.y)
-        dest_tile.piece.firstMove = False
+        dest_tile.piece = moved
+        moved.move(dest_tile.x, dest_tile.y)
+        moved.firstMove = False
+
+        # Update hash
+        self.hash ^= zobrist.piece_key(piece, source[0], source[1]) ^ zobrist.piece_key(moved, dest[0], dest[1])
+        if captured:
+            self.hash ^= zobrist.piece_key(captured, dest[0], dest[1])
 
         # Update king coords if necessary
-        if type(source_tile.piece) is King:
-            if source_tile.piece.color == BLACK:
+        if type(moved) is King:
+            if moved.color == BLACK:
                 self.blackKingCoords = dest_tile.x, dest_tile.y
             else:
                 self.whiteKingCoords = dest_tile.x, dest_tile.y
@@ -384,30 +705,56 @@ class Board:
         source_tile.piece = None
         source_tile.fill(source_tile.color)
 
-        # Check win conditions
-        self.checkmate_stalemate()
-        self.insufficient_material()
+        # Win conditions are checked when gameover is next asked for
+        self._gameover = _UNKNOWN
+
+    def make_null_move(self):
+        """
+        Passes the turn without moving, as used by null-move pruning; undone by unmake_move
+        :return: None
+        """
+        self.past_moves.append(None)
+        self.next_turn()
 
     def unmake_move(self):
         """
         Undoes previous move; restores game state
         :return: None
         """
+        if self.past_moves[-1] is None:
+            self.past_moves.pop()
+            self.next_turn()
+            return
+
         # Revert to previous game state using stored values
-        previous_state = self.past_moves.pop()
-        self.blackScore = previous_state["blackScore"]
-        self.whiteScore = previous_state["whiteScore"]
-        self.blackKingCoords = previous_state["blackKingCoords"]
-        self.whiteKingCoords = previous_state["whiteKingCoords"]
-        x = previous_state["tile1"][0][0]
-        y = previous_state["tile1"][0][1]
-        self.tilemap[x][y] = previous_state["tile1"][1]
-        x = previous_state["tile2"][0][0]
-        y = previous_state["tile2"][0][1]
-        self.tilemap[x][y] = previous_state["tile2"][1]
-        self.gameover = previous_state["gameover"]
+        source, dest, piece, captured, captured_index, first_move, self.blackScore, self.whiteScore, \
+            self.opening_score, self.endgame_score, self.phase, \
+            self.blackKingCoords, self.whiteKingCoords, gameover = self.past_moves.pop()
+
+        # Revert hash using the piece that is on dest now (the queen if the move was a promotion)
+        moved = self.tilemap[dest[0]][dest[1]].piece
+        self.hash ^= zobrist.piece_key(piece, source[0], source[1]) ^ zobrist.piece_key(moved, dest[0], dest[1])
+        if captured:
+            self.hash ^= zobrist.piece_key(captured, dest[0], dest[1])
+
+        # Restore piece lists and counts
+        if moved is not piece:
+            piece_list = self.piece_lists[piece.color]
+            piece_list[piece_list.index(moved)] = piece
+            self.piece_counts[Queen, piece.color] -= 1
+            self.piece_counts[Pawn, piece.color] += 1
+        if captured:
+            self.piece_lists[captured.color].insert(captured_index, captured)
+            self.piece_counts[type(captured), captured.color] += 1
+
+        # Put the original piece back (this also reverts a promotion) and restore the captured piece
+        self.tilemap[source[0]][source[1]].piece = piece
+        piece.move(source[0], source[1])
+        piece.firstMove = first_move
+        self.tilemap[dest[0]][dest[1]].piece = captured
 
         self.next_turn()
+        self._gameover = gameover
 
     def next_turn(self) -> None:
         """
@@ -418,8 +765,10 @@ class Board:
             self.turn = BLACK
         else:
             self.turn = WHITE
+        self.hash ^= zobrist.BLACK_TO_MOVE
 
         self.bottomPlayerTurn = not self.bottomPlayerTurn
+        self._gameover = _UNKNOWN
 
     def checkmate_stalemate(self) -> bool:
         """
@@ -427,80 +776,59 @@ class Board:
         :return: None
         """
 
-        legal_moves = 0
-        for x in range(8):
-            for y in range(8):
-                if self.piece_at_coords((x, y)) and self.tilemap[x][y].piece.color == self.turn:
-                    moves = self.tilemap[x][y].piece.valid_moves(self)  # + self.can_castle(self.tilemap[x][y].piece.color)
-                    for move in moves:
-                        if not self.in_check_after_move((x, y), move, self.tilemap[x][y].piece.color):
-                            legal_moves += 1
+        # Any legal move rules out both; the moves are cached for get_moves and the UI
+        if self.cached_moves():
+            return
 
         if self.turn == WHITE:
             opponent = BLACK
         else:
             opponent = WHITE
 
-        if legal_moves == 0 and not self.in_check(self.turn):
+        if not self.in_check(self.turn):
             self.gameover = ("Stalemate", None)
-        elif legal_moves == 0:
+        else:
             self.gameover = ("Checkmate", opponent)
 
-    def get_moves(self):
+    def get_moves(self, captures_only=False):
         """
         Returns a list of the available moves for the current player
-        :return: list
+        :param captures_only: only return captures and promotions, as used by quiescence search (bool)
+        :return: list of packed moves (see encoding.py), captures first
         """
-        moves = []
-        for x in range(8):
-            for y in range(8):
-                if self.piece_at_coords((x, y)) and self.tilemap[x][y].piece.color == self.turn:
-                    for move in self.tilemap[x][y].piece.valid_moves(self):
-                        if not self.in_check_after_move((x, y), move, self.turn):
-                            if self.enemy_at_coords(move, self.turn):
-                                moves.insert(0, ((x, y), move))
-                            else:
-                                moves.append(((x, y), move))
-        return list(set(moves))          # converting to set then back to list has randomizing effect on moves
+        if captures_only:
+            return [move for move in self.cached_moves() if move & (CAPTURE | PROMOTION_MASK)]
+        return list(self.cached_moves())
 
     def get_moves_sorted(self):
         """
-        Returns a list of the available moves sorted in descending order by value for the current player
-        :return: list
+        Returns a list of the available moves for the current player, captures and promotions first ordered by
+        MVV-LVA; no move is made to sort them
+        :return: list of packed moves (see encoding.py)
         """
-        b = self.copy()
-        moves = {}
-        for x in range(8):
-            for y in range(8):
-                if self.piece_at_coords((x, y)) and self.tilemap[x][y].piece.color == self.turn:
-                    for move in self.tilemap[x][y].piece.valid_moves(self):
-                        if not self.in_check_after_move((x, y), move, self.turn) and ((x, y), move) not in moves:
-                            b.make_move((x, y), move)
-                            moves[((x, y), move)] = AI.evaluate(b, self.turn)
-                            b.unmake_move()
-        return [move for move, score in sorted(moves.items(), key=lambda v: v[1], reverse=True)]
+        return sorted(self.cached_moves(), key=lambda move: mvv_lva(self, move), reverse=True)
+
+    def non_pawn_material(self, color) -> bool:
+        """
+        Returns True if the player of specified color has a piece besides the king and pawns
+        :param color: color of player to check (tuple)
+        :return: bool
+        """
+        counts = self.piece_counts
+        return bool(counts[Queen, color] or counts[Rook, color] or counts[Bishop, color] or counts[Knight, color])
 
     def insufficient_material(self):
         # Insufficient material
-        piece_counts = {"wminor": 0, "bminor": 0, "king": 0, "wknight": 0, "bknight": 0}
-        for x in range(8):
-            for y in range(8):
-                piece = self.tilemap[x][y].piece
-                if piece:
-                    # if a Queen is present, insufficient material is impossible
-                    if type(piece) is Queen:
-                        return
-                    if type(piece) is King:
-                        piece_counts["king"] += 1
-                    elif type(piece) is Knight and piece.color == WHITE:
-                        piece_counts["wknight"] += 1
-                    elif type(piece) is Knight and piece.color == BLACK:
-                        piece_counts["bknight"] += 1
-                    else:
-                        if piece.color == WHITE:
-                            piece_counts["wminor"] += 1
-                        elif piece.color == BLACK:
-                            piece_counts["bminor"] += 1
+        counts = self.piece_counts
+
+        # if a Queen is present, insufficient material is impossible
+        if counts[Queen, WHITE] or counts[Queen, BLACK]:
+            return
+        piece_counts = {"king": counts[King, WHITE] + counts[King, BLACK],
+                        "wknight": counts[Knight, WHITE],
+                        "bknight": counts[Knight, BLACK],
+                        "wminor": counts[Bishop, WHITE] + counts[Rook, WHITE] + counts[Pawn, WHITE],
+                        "bminor": counts[Bishop, BLACK] + counts[Rook, BLACK] + counts[Pawn, BLACK]}
 
         # King vs King
         if piece_counts["wminor"] == piece_counts["bminor"] == piece_counts["wknight"] == piece_counts["bknight"] == 0 and piece_counts["king"] == 2:
@@ -513,4 +841,3 @@ class Board:
             self.gameover = ("Insufficient Material", None)
         elif (piece_counts["wminor"] == 1 and piece_counts["king"] == 2 and piece_counts["bminor"] == 0) or (piece_counts["bminor"] == 1 and piece_counts["king"] == 2 and piece_counts["wminor"] == 0):
             self.gameover = ("Insufficient Material", None)
-
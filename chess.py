@@ -1,10 +1,12 @@
-from math import inf
+import os
+import pygame
 import pygame_menu
 import queue
-import sys
 import threading
-import time
+import AI
+from bitboard import BitBoard
 from board import *
+from render import *
 from timer import Timer
 
 # Initialize Pygame
@@ -19,6 +21,9 @@ pygame.display.set_caption("ChessAI")
 icon = pygame.image.load(os.path.join('img', 'icon.png'))
 pygame.display.set_icon(icon)
 
+# Posted by the AI worker when it has found a move; carries the move and the generation it was searched in
+AI_MOVE_EVENT = pygame.USEREVENT + 1
+
 
 class Game:
 
@@ -32,8 +37,26 @@ class Game:
         self.p1_color = WHITE
         self.p2_color = BLACK
 
-        self.ai_move = queue.Queue()
-        self.lock = threading.Lock()
+        # Searches for the AI worker to run, as (generation, stop, ponder) with ponder None for a move search, and
+        # whether the AI owes a move this generation
+        self.search_requests = queue.Queue()
+        self.ai_thinking = False
+
+        # One worker thread runs every search of the session, pondering included, so no thread is created per move
+        # and searches never overlap on the shared tables
+        self.worker = threading.Thread(target=self.ai_worker, daemon=True)
+        self.worker.start()
+
+        # Search running on the human's time, and depth the AI reached on its last move
+        self.ponder = None
+        self.ai_depth = 0
+
+        # Turn the turn indicator was last drawn for
+        self.indicator = None
+
+        # Moves are queued with the generation they were searched in; cancel_search starts a new generation
+        self.generation = 0
+        self.search_stop = threading.Event()
 
         self.board = Board(self.p1_color)
         self.board.initialize_pieces()
@@ -52,7 +75,22 @@ class Game:
         self.p2_color = BLACK
         self.board = Board(self.p1_color)
         self.board.initialize_pieces()
-        self.ai_move = queue.Queue()
+        self.cancel_search()
+        self.ai_depth = 0
+
+    def cancel_search(self):
+        """
+        Stops AI searches that are in progress or queued, pondering included; moves they still post are discarded
+        :return: None
+        """
+        self.generation += 1
+        self.ai_thinking = False
+        self.search_stop.set()
+        self.search_stop = threading.Event()
+        ponder = self.ponder
+        self.ponder = None
+        if ponder:
+            ponder.stop.set()
 
     def set_name(self, name):
         """
@@ -126,19 +164,53 @@ class Game:
 
             pygame.display.flip()
 
-    def determine_move(self):
+    def ai_worker(self):
+        """
+        Runs the AI's searches and pondering one after another for as long as the game is open
+        :return: None
+        """
+        while True:
+            generation, stop, ponder = self.search_requests.get()
+            # Search was cancelled, or the human moved, before it started
+            if stop.is_set():
+                continue
+            if ponder:
+                ponder.run()
+            else:
+                self.determine_move(generation, stop)
+
+    def determine_move(self, generation, stop):
         """
-        Determines move for AI and places move in thread-safe container (Queue)
+        Determines move for AI and posts it to the game loop as an AI_MOVE_EVENT
+        :param generation: generation the move is searched in, posted along with the move (int)
+        :param stop: stops the search when set by cancel_search (threading.Event)
         :return: None
         """
         # Determine move based on selected AI
         if self.p2_name == "Minimax":
-            self.ai_move.put(AI.minimax(self.board.copy(), 3, inf, -inf, True, self.p2_color)[0])
+            # Ponder hit: the human played a reply the AI already searched at least as deep as its last move
+            # (before its first search there's no depth to compare with, so it searches normally)
+            pondered = None
+            ponder = self.ponder
+            self.ponder = None
+            if ponder:
+                pondered = ponder.finish(self.board)
+
+            # Pondering ran on this thread and is over, so the shared tables can be aged for the new search
+            AI.TABLE.new_search()
+            AI.ORDERING.new_search()
+
+            if pondered and pondered[0] and self.ai_depth and pondered[2] >= self.ai_depth:
+                move = pondered[0]
+            else:
+                time_limit = AI.allocate_time(self.p2_timer.time)
+                move, _, depth = AI.iterative_deepening(BitBoard.from_board(self.board), self.p2_color, time_limit,
+                                                        stop=stop)
+                if depth and not stop.is_set():
+                    self.ai_depth = depth
         else:
-            self.ai_move.put(AI.random_move(self.board))
-
-        # Close thread after move has been found
-        sys.exit()
+            move = AI.random_move(self.board)
+        pygame.event.post(pygame.event.Event(AI_MOVE_EVENT, move=move, generation=generation))
 
     def game_screen(self):
         """
@@ -149,12 +221,6 @@ class Game:
         # Create clock to keep track of time
         clock = pygame.time.Clock()
 
-        # Stores time passed since last frame (used to tick player timers)
-        dt = 0
-
-        # Create a thread which will be used to determine AI's move concurrently with rest of game
-        t = threading.Thread(target=self.determine_move)
-
         # Keeps track of whether or not human player has resigned
         p1_resigned = False
 
@@ -162,45 +228,50 @@ class Game:
         resign_button = pygame.Rect(BOARD_X + BOARD_SIZE + 8, BOARD_Y + BOARD_SIZE + 8,
                                     int((TILE_SIZE * 4 + 8) / 2 - 4), 28)
 
+        # Draw everything that doesn't change during the game once; after that only changed areas are redrawn
+        background = render_background(self.board)
+        SCREEN.blit(background, (0, 0))
+        self.draw_names()
+        self.draw_resign_button()
+        view = BoardView(background)
+        self.p1_timer.invalidate()
+        self.p2_timer.invalidate()
+        self.indicator = None
+        pygame.display.flip()
+
         # Game screen loop
         while True:
 
-            for event in pygame.event.get():
+            # Sleep until something happens or the timer that is running has to show a new time
+            timer = self.p2_timer if self.board.turn == self.p2_color else self.p1_timer
+            events = [pygame.event.wait(timer.until_change())] + pygame.event.get()
+
+            for event in events:
                 # Pygame window was closed
                 if event.type == pygame.QUIT:
                     pygame.quit()
                     exit()
                 # Check if any buttons were pressed or pieces were selected
                 if event.type == pygame.MOUSEBUTTONDOWN:
-                    self.board.select()
+                    self.board.select(to_grid(event.pos))
                     mouse_pos = event.pos
-                    self.board.draw()
-                    pygame.display.flip()
                     # Resign button was pressed
                     if resign_button.collidepoint(mouse_pos):
                         p1_resigned = True
+                # AI found a move; moves of cancelled searches are dropped
+                if event.type == AI_MOVE_EVENT and event.generation == self.generation:
+                    self.ai_thinking = False
+                    if self.board.turn == self.p2_color and not self.board.gameover:
+                        self.board.make_move(event.move)
+                        self.board.next_turn()
 
-            # Draw background first (everything else goes on top of it)
-            SCREEN.fill(BG_COLOR)
-
-            # Decrement timer for player of current turn
-            if self.board.turn == self.p2_color:
-                self.p2_timer.tick(dt)
-            else:
-                self.p1_timer.tick(dt)
-
-            # Draw UI elements
-            self.draw_names()
-            self.draw_turn_indicator()
-            self.p1_timer.draw()
-            self.p2_timer.draw()
-            self.draw_resign_button()
+            # Decrement timer for player whose turn it was while waiting
+            timer.tick(clock.tick() / 1000)
 
-            # Check for endgame state
-            self.board.checkmate_stalemate()
-            self.board.insufficient_material()
+            # Draw UI elements that changed, remembering where the screen was drawn on
+            dirty = [self.draw_turn_indicator(background), self.p1_timer.draw(), self.p2_timer.draw()]
 
-            # GAME OVER: Checkmate, Stalemate, or Insufficient Material
+            # GAME OVER: Checkmate, Stalemate, or Insufficient Material (computed once per move, then cached)
             if self.board.gameover:
                 print("GAME OVER: ", self.board.gameover[0])
                 if self.board.gameover[0] == "Insufficient Material" or self.board.gameover[0] == "Stalemate":
@@ -228,43 +299,40 @@ class Game:
 
             # Tell AI to determine move if...
             # 1 - It is their turn
-            # 2 - They haven't found a move already
+            # 2 - They haven't been asked for a move already (the worker posts AI_MOVE_EVENT when it's found)
             # 3 - The game is not over
-            # 4 - They aren't currently searching for a move (ensure 'determine_move' thread is not running)
-            self.lock.acquire()
             if self.board.turn == self.p2_color \
-                    and self.ai_move.qsize() == 0 \
-                    and not self.board.gameover \
-                    and not t.is_alive():
-                # Need to remake thread, since a thread can only be started once
-                t = threading.Thread(target=self.determine_move)
-                t.start()
-            self.lock.release()
-
-            # Tell AI to make their move if...
-            # 1 - It is their turn
-            # 2 - They found a move
+                    and not self.ai_thinking \
+                    and not self.board.gameover:
+                self.ai_thinking = True
+                # The worker finishes pondering before it picks up the search
+                if self.ponder:
+                    self.ponder.stop.set()
+                self.search_requests.put((self.generation, self.search_stop, None))
+
+            # Let AI search on the human's time if...
+            # 1 - It is the human's turn
+            # 2 - The AI is Minimax and isn't pondering already
             # 3 - The game is not over
-            if self.board.turn == self.p2_color \
-                    and self.ai_move.qsize() > 0 \
+            if self.board.turn == self.p1_color \
+                    and self.p2_name == "Minimax" \
+                    and self.ponder is None \
                     and not self.board.gameover:
-                move = self.ai_move.get()
-                self.board.make_move(move[0], move[1])
-                self.board.next_turn()
+                self.ponder = AI.Ponder(BitBoard.from_board(self.board), self.p2_color)
+                self.search_requests.put((self.generation, self.ponder.stop, self.ponder))
 
-            # Update time since last frame
-            dt = clock.tick(30) / 1000
+            # Draw the tiles that changed
+            dirty += view.draw(self.board)
 
-            # Draw all components of board
-            self.board.draw()
-
-            # Update display
-            pygame.display.flip()
+            # Update only the changed areas of the display
+            dirty = [rect for rect in dirty if rect]
+            if dirty:
+                pygame.display.update(dirty)
 
             # Self-play
             # if self.board.turn == self.p1_color:
             #     move = AI.random_move(self.board)
-            #     self.board.make_move(move[0], move[1])
+            #     self.board.make_move(move)
             #     self.board.next_turn()
 
     def end_screen(self, condition, winner=None):
@@ -275,6 +343,9 @@ class Game:
         :return: None
         """
 
+        # Game is over, so the AI shouldn't keep thinking
+        self.cancel_search()
+
         # Create background for end screen
         bg = pygame.Rect(int(BOARD_X + TILE_SIZE * 2.5), int(BOARD_Y + TILE_SIZE * 2.5), TILE_SIZE * 3, TILE_SIZE * 2)
 
@@ -288,17 +359,19 @@ class Game:
             f.fill(BG_COLOR)
             for alpha in range(0, 175):
                 f.set_alpha(alpha)
-                self.board.draw()
+                draw_board(self.board)
                 SCREEN.blit(f, (0, 0))
                 pygame.display.update()
                 pygame.time.delay(1)
 
-        # Controls fade effect
-        fading = True
+        # Apply fade effect and draw UI elements once; nothing changes until a button is pressed
+        fade(SCREEN_WIDTH, SCREEN_HEIGHT)
+        self.draw_end_message(condition, winner)
+        pygame.display.flip()
 
         # End screen loop
         while True:
-            for event in pygame.event.get():
+            for event in [pygame.event.wait()] + pygame.event.get():
                 # Pygame window was closed
                 if event.type == pygame.QUIT:
                     pygame.quit()
@@ -317,19 +390,8 @@ class Game:
                         self.reset()
                         return self.menu_screen()
 
-            # Apply fade effect
-            if fading:
-                fade(SCREEN_WIDTH, SCREEN_HEIGHT)
-                fading = False
-
-            # Draw UI elements
-            self.draw_end_message(condition, winner)
-
-            # Update display
-            pygame.display.flip()
-
             # Self-play
-            # time.sleep(1)
+            # pygame.time.delay(1000)
             # self.reset()
             # return self.game_screen()
 
@@ -340,24 +402,36 @@ class Game:
         """
         # Draw top name (player 2)
         pygame.draw.rect(SCREEN, BG_COLOR_LIGHT, [BOARD_X, BOARD_Y - 36, TILE_SIZE * 2, 28])
-        p1name = FONT.render(self.p2_name, True, SMALL_TEXT_COLOR)
+        p1name = render_text(FONT, self.p2_name, SMALL_TEXT_COLOR)
         SCREEN.blit(p1name, (BOARD_X + 4, BOARD_Y - 34))
         # Draw bottom name (player 1)
         pygame.draw.rect(SCREEN, BG_COLOR_LIGHT, [BOARD_X, BOARD_Y + BOARD_SIZE + 8, TILE_SIZE * 2, 28])
-        p2name = FONT.render(self.p1_name, True, SMALL_TEXT_COLOR)
+        p2name = render_text(FONT, self.p1_name, SMALL_TEXT_COLOR)
         SCREEN.blit(p2name, (BOARD_X + 4, BOARD_Y + BOARD_SIZE + 10))
 
-    def draw_turn_indicator(self):
+    def draw_turn_indicator(self, background):
         """
-        Draws turn indicator based on turn of current player in game screen
-        :return: None
+        Draws turn indicator based on turn of current player in game screen, if the turn changed since it was
+        last drawn
+        :param background: pre-rendered background to clear the previous text with (pygame.Surface)
+        :return: pygame.Rect that was drawn on, or None if nothing changed
         """
+        if self.indicator == self.board.turn:
+            return None
+        self.indicator = self.board.turn
+
+        # Clear the area between the names and the bottom timer
+        left = int(BOARD_X + TILE_SIZE * 3.5 + 8)
+        rect = pygame.Rect(left, BOARD_Y + BOARD_SIZE + 8, BOARD_X + BOARD_SIZE - TILE_SIZE - left, 28)
+        SCREEN.blit(background, rect, rect)
+
         if self.board.turn == self.p1_color:
-            txt = FONT.render("YOUR TURN", True, LARGE_TEXT_COLOR)
+            txt = render_text(FONT, "YOUR TURN", LARGE_TEXT_COLOR)
             SCREEN.blit(txt, (int(BOARD_X + TILE_SIZE * 3.5 + 8), BOARD_Y + BOARD_SIZE + 10))
         else:
-            txt = FONT.render("AI is thinking...", True, LARGE_TEXT_COLOR)
+            txt = render_text(FONT, "AI is thinking...", LARGE_TEXT_COLOR)
             SCREEN.blit(txt, (int(BOARD_X + TILE_SIZE * 3.5 + 8), BOARD_Y + BOARD_SIZE + 10))
+        return rect
 
     @staticmethod
     def draw_resign_button():
@@ -367,7 +441,7 @@ class Game:
         """
         pygame.draw.rect(SCREEN, BG_COLOR_LIGHT, [BOARD_X + BOARD_SIZE + 8, BOARD_Y + BOARD_SIZE + 8,
                                                   int((TILE_SIZE * 4 + 8) / 2 - 4), 28])
-        txt = FONT.render("Resign", True, SMALL_TEXT_COLOR)
+        txt = render_text(FONT, "Resign", SMALL_TEXT_COLOR)
         SCREEN.blit(txt, (BOARD_X + BOARD_SIZE + 40, BOARD_Y + BOARD_SIZE + 10))
 
     @staticmethod
@@ -385,17 +459,17 @@ class Game:
         pygame.draw.rect(SCREEN, BLACK,
                          [int(BOARD_X + TILE_SIZE * 2.5), int(BOARD_Y + TILE_SIZE * 2.5), TILE_SIZE * 3, TILE_SIZE * 2],
                          1)
-        txt = BIG_FONT.render("Game Over", True, LARGE_TEXT_COLOR)
+        txt = render_text(BIG_FONT, "Game Over", LARGE_TEXT_COLOR)
         SCREEN.blit(txt, (BOARD_X + TILE_SIZE * 3 - 8, int(BOARD_Y + TILE_SIZE * 2.5 + 4)))
 
         # Draw win condition and winner (if applicable)
         if winner:
-            txt = FONT.render(winner + " won", True, SMALL_TEXT_COLOR)
+            txt = render_text(FONT, winner + " won", SMALL_TEXT_COLOR)
             SCREEN.blit(txt, (BOARD_X + TILE_SIZE * 3, BOARD_Y + TILE_SIZE * 3 + 4))
-            txt = FONT.render(f"by {condition}", True, SMALL_TEXT_COLOR)
+            txt = render_text(FONT, f"by {condition}", SMALL_TEXT_COLOR)
             SCREEN.blit(txt, (BOARD_X + TILE_SIZE * 3, int(BOARD_Y + TILE_SIZE * 3.4)))
         else:
-            txt = FONT.render(f"{condition}", True, SMALL_TEXT_COLOR)
+            txt = render_text(FONT, f"{condition}", SMALL_TEXT_COLOR)
             if condition == "Insufficient Material":
                 SCREEN.blit(txt, (int(BOARD_X + TILE_SIZE * 2.55), int(BOARD_Y + TILE_SIZE * 3.3)))
             else:
@@ -403,12 +477,12 @@ class Game:
 
         # Draw Rematch button
         pygame.draw.rect(SCREEN, BLACK, [bg.left, bg.bottom - 28, bg.centerx - bg.left + 3, 28], 1)
-        txt = FONT.render("Rematch", True, SMALL_TEXT_COLOR)
+        txt = render_text(FONT, "Rematch", SMALL_TEXT_COLOR)
         SCREEN.blit(txt, (bg.left + 8, bg.bottom - 28 + 2))
 
         # Draw Leave button
         pygame.draw.rect(SCREEN, BLACK, [bg.centerx + 2, bg.bottom - 28, bg.centerx - bg.left - 2, 28], 1)
-        txt = FONT.render("Leave", True, SMALL_TEXT_COLOR)
+        txt = render_text(FONT, "Leave", SMALL_TEXT_COLOR)
         SCREEN.blit(txt, (bg.centerx + 20, bg.bottom - 28 + 2))
 
 
@@ -0,0 +1,155 @@
+from piece import *
+
+# Material in centipawns
+PIECE_VALUES = {King: 9000, Queen: 900, Rook: 500, Bishop: 300, Knight: 300, Pawn: 100}
+
+# Contribution of each piece to the game phase; MAX_PHASE with all minor and major pieces on the board
+PHASE_WEIGHTS = {King: 0, Queen: 4, Rook: 2, Bishop: 1, Knight: 1, Pawn: 0}
+MAX_PHASE = 24
+
+# Piece-square tables in centipawns for white, laid out as seen from white's side (first row is rank 8)
+OPENING_TABLES = {
+    Pawn: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0,
+    ],
+    Knight: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ],
+    Bishop: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ],
+    Rook: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0,
+    ],
+    Queen: [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20,
+    ],
+    King: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20,
+    ],
+}
+
+# In the endgame pawns are worth more the further they have advanced and the king belongs in the centre
+ENDGAME_TABLES = dict(OPENING_TABLES)
+ENDGAME_TABLES[Pawn] = [
+    0, 0, 0, 0, 0, 0, 0, 0,
+    80, 80, 80, 80, 80, 80, 80, 80,
+    50, 50, 50, 50, 50, 50, 50, 50,
+    30, 30, 30, 30, 30, 30, 30, 30,
+    20, 20, 20, 20, 20, 20, 20, 20,
+    10, 10, 10, 10, 10, 10, 10, 10,
+    10, 10, 10, 10, 10, 10, 10, 10,
+    0, 0, 0, 0, 0, 0, 0, 0,
+]
+ENDGAME_TABLES[King] = [
+    -50, -40, -30, -20, -20, -30, -40, -50,
+    -30, -20, -10, 0, 0, -10, -20, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 30, 40, 40, 30, -10, -30,
+    -30, -10, 20, 30, 30, 20, -10, -30,
+    -30, -30, 0, 0, 0, 0, -30, -30,
+    -50, -30, -30, -30, -30, -30, -30, -50,
+]
+
+
+def _orient(tables, player):
+    """
+    Rearranges piece-square tables into signed values indexed by x * 8 + y, the same as Zobrist keys
+    :param tables: OPENING_TABLES or ENDGAME_TABLES (dict)
+    :param player: color of the player at the bottom of the board (tuple)
+    :return: dict mapping (piece type, color) to a list of 64 scores from white's point of view
+    """
+    oriented = {}
+    for piece_type, table in tables.items():
+        for color in (WHITE, BLACK):
+            scores = []
+            for x in range(8):
+                for y in range(8):
+                    # File and rank (0 is rank 1) of the square, see Board.square_name
+                    file, rank = (7 - x, y) if player == BLACK else (x, 7 - y)
+                    if color == WHITE:
+                        scores.append(table[(7 - rank) * 8 + file])
+                    else:
+                        scores.append(-table[rank * 8 + file])
+            oriented[piece_type, color] = scores
+    return oriented
+
+
+# Indexed [player][piece type, color][x * 8 + y], since the grid is flipped when the player is black
+OPENING = {player: _orient(OPENING_TABLES, player) for player in (WHITE, BLACK)}
+ENDGAME = {player: _orient(ENDGAME_TABLES, player) for player in (WHITE, BLACK)}
+
+
+def taper(opening, endgame, phase):
+    """
+    Blends opening and endgame scores by how much material is left
+    :param opening: score with all pieces on the board (int)
+    :param endgame: score with only kings and pawns left (int)
+    :param phase: sum of PHASE_WEIGHTS of the pieces on the board (int)
+    :return: int
+    """
+    phase = min(phase, MAX_PHASE)
+    return (opening * phase + endgame * (MAX_PHASE - phase)) // MAX_PHASE
+
+
+def score_board(board):
+    """
+    Computes the piece-square scores and phase of a board from scratch
+    :param board: board to score (Board)
+    :return: tuple; format: (opening, endgame, phase)
+    """
+    opening_table = OPENING[board.player]
+    endgame_table = ENDGAME[board.player]
+    opening = endgame = phase = 0
+    for x in range(8):
+        for y in range(8):
+            piece = board.tilemap[x][y].piece
+            if piece:
+                key = type(piece), piece.color
+                opening += opening_table[key][x * 8 + y]
+                endgame += endgame_table[key][x * 8 + y]
+                phase += PHASE_WEIGHTS[type(piece)]
+    return opening, endgame, phase
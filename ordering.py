@@ -0,0 +1,150 @@
+from piece import *
+from encoding import *
+from evaluation import PIECE_VALUES
+
+# Rank of each piece type for MVV-LVA (most valuable victim, least valuable attacker)
+ORDER_VALUES = {Pawn: 1, Knight: 2, Bishop: 3, Rook: 4, Queen: 5, King: 6}
+
+# Move scores; every band is above the largest score of the band below it
+HASH_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORE = 1 << 27
+LOSING_CAPTURE_SCORE = 1 << 26
+HISTORY_LIMIT = 1 << 26
+
+# Source and destination bits of a packed move, used to index the history table
+FROM_TO_MASK = (1 << PROMOTION_SHIFT) - 1
+
+
+def mvv_lva(board, move):
+    """
+    Scores a capture or promotion by the piece it wins and the piece that wins it, without making the move
+    :param board: board the move is played on (Board or BitBoard)
+    :param move: packed move (int)
+    :return: int, 0 for quiet moves
+    """
+    score = 0
+    if move & CAPTURE:
+        victim = board.type_at(move >> DEST_SHIFT & SQUARE_MASK)
+        attacker = board.type_at(move & SQUARE_MASK)
+        score += ORDER_VALUES[victim] * 8 - ORDER_VALUES[attacker]
+    if move & PROMOTION_MASK:
+        score += ORDER_VALUES[Queen] * 8
+    return score
+
+
+def losing_capture(board, move):
+    """
+    Returns True if a capture loses material once all recaptures on the square are played out; only runs
+    static exchange evaluation when the attacker is worth more than the piece it captures
+    :param board: board the move is played on (Board or BitBoard)
+    :param move: packed move (int)
+    :return: bool
+    """
+    if not move & CAPTURE or move & PROMOTION_MASK:
+        return False
+    victim = board.type_at(move >> DEST_SHIFT & SQUARE_MASK)
+    attacker = board.type_at(move & SQUARE_MASK)
+    if PIECE_VALUES[victim] >= PIECE_VALUES[attacker]:
+        return False
+    return board.see(move) < 0
+
+
+class MoveOrdering:
+
+    def __init__(self):
+        """
+        Orders moves for minimax: hash move, then captures that don't lose material by MVV-LVA, then two
+        killer moves per ply, then losing captures, then quiet moves by how often they caused cutoffs
+        (history heuristic)
+        """
+        # Maps ply to up to two quiet moves that caused a cutoff there, most recent first
+        self.killers = {}
+        self.history = [0] * (FROM_TO_MASK + 1)
+
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def clear(self):
+        """
+        Forgets killers and history and resets counters
+        :return: None
+        """
+        self.killers = {}
+        self.history = [0] * len(self.history)
+        self.reset_stats()
+
+    def new_search(self):
+        """
+        Forgets killers from the previous search and fades history so recent cutoffs count more
+        :return: None
+        """
+        self.killers = {}
+        self.history = [score // 2 for score in self.history]
+
+    def reset_stats(self):
+        """
+        Resets cutoff counters
+        :return: None
+        """
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def order(self, board, moves, hash_move, ply):
+        """
+        Sorts moves in place, best first, without making any of them
+        :param board: board the moves are played on (Board or BitBoard)
+        :param moves: packed moves (list)
+        :param hash_move: best move stored in the transposition table, or None
+        :param ply: number of moves made since the start of the game (int)
+        :return: the sorted moves
+        """
+        killers = self.killers.get(ply, ())
+        history = self.history
+
+        def score(move):
+            if move == hash_move:
+                return HASH_SCORE
+            if move & (CAPTURE | PROMOTION_MASK):
+                if losing_capture(board, move):
+                    return LOSING_CAPTURE_SCORE + mvv_lva(board, move)
+                return CAPTURE_SCORE + mvv_lva(board, move)
+            if move in killers:
+                return KILLER_SCORE - killers.index(move)
+            return history[move & FROM_TO_MASK]
+
+        moves.sort(key=score, reverse=True)
+        return moves
+
+    def cutoff(self, move, index, depth, ply):
+        """
+        Records a beta cutoff; quiet moves become killers for the ply and gain history
+        :param move: move that caused the cutoff (int)
+        :param index: position of the move in the ordered list (int)
+        :param depth: remaining depth of the node (int)
+        :param ply: number of moves made since the start of the game (int)
+        :return: None
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        if move & (CAPTURE | PROMOTION_MASK):
+            return
+
+        killers = self.killers.setdefault(ply, [])
+        if move not in killers:
+            killers.insert(0, move)
+            del killers[2:]
+
+        self.history[move & FROM_TO_MASK] += depth * depth
+        if self.history[move & FROM_TO_MASK] >= HISTORY_LIMIT:
+            self.history = [score // 2 for score in self.history]
+
+    def stats(self):
+        """
+        Returns cutoff counters; a first move rate close to 1 means the ordering finds the best move first
+        :return: dict
+        """
+        return {"cutoffs": self.cutoffs,
+                "first_move_cutoffs": self.first_move_cutoffs,
+                "first_move_rate": self.first_move_cutoffs / self.cutoffs if self.cutoffs else 0.0}
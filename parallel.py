@@ -0,0 +1,132 @@
+import os
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+from math import inf
+
+import AI
+from transposition import NullTable
+
+# Seconds between checks of the caller's stop event while waiting for workers
+POLL_INTERVAL = 0.01
+
+# Best score found so far by any worker in the current search, and id of the search tasks should belong to
+# (set by _init_worker)
+_shared_alpha = None
+_search_id = None
+
+
+def _init_worker(shared_alpha, search_id):
+    """
+    Stores the shared alpha and search id in each worker process
+    :param shared_alpha: best score found so far by any worker (multiprocessing.Value)
+    :param search_id: id of the current search, changed to cancel its tasks (multiprocessing.RawValue)
+    :return: None
+    """
+    global _shared_alpha, _search_id
+    _shared_alpha = shared_alpha
+    _search_id = search_id
+
+
+class _Cancelled:
+
+    def __init__(self, search_id):
+        """
+        Used as the stop event of a task; set once the task's search was cancelled or a newer one started
+        :param search_id: id of the search the task belongs to (int)
+        """
+        self.search_id = search_id
+
+    def is_set(self):
+        return _search_id.value != self.search_id
+
+
+def _search_root_move(board, move, depth, maximizing_color, deterministic, deadline, search_id):
+    """
+    Searches a single root move inside a worker process
+    :return: tuple of score and the alpha the search started with; the score is exact only if it is above that alpha
+    """
+    limits = AI.SearchLimits(deadline, stop=_Cancelled(search_id))
+    board.make_move(move)
+    board.next_turn()
+
+    # Deterministic searches use a full window and no table, so the result doesn't depend on other workers
+    if deterministic:
+        return AI.minimax(board, depth - 1, -inf, inf, False, maximizing_color, NullTable(), limits)[1], -inf
+
+    alpha = _shared_alpha.value
+    score = AI.minimax(board, depth - 1, alpha, inf, False, maximizing_color, None, limits)[1]
+    with _shared_alpha.get_lock():
+        if score > _shared_alpha.value:
+            _shared_alpha.value = score
+    return score, alpha
+
+
+class ParallelSearch:
+
+    def __init__(self, workers=None, deterministic=False):
+        """
+        Root-parallel minimax: every root move is searched in its own task on a pool of worker processes.
+        Workers keep their own transposition tables and share the best root score found so far as alpha.
+        In deterministic mode no tables or shared bounds are used, and the result is identical to
+        AI.minimax(board, depth, -inf, inf, True, maximizing_color, NullTable())
+        :param workers: number of worker processes, defaults to the number of CPUs (int)
+        :param deterministic: True to make results independent of timing (bool)
+        """
+        self.workers = workers or os.cpu_count()
+        self.deterministic = deterministic
+        self.alpha = multiprocessing.Value("d", -inf)
+        self.search_id = multiprocessing.RawValue("i", 0)
+        self.executor = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                            initargs=(self.alpha, self.search_id))
+
+    def search(self, board, depth, maximizing_color, deadline=None, first_move=None, stop=None):
+        """
+        Finds the best move for the player to move, who is the maximizing player
+        :param board: the current board being used for the game; left unchanged (Board)
+        :param depth: controls how deep to search the tree of possible moves (int)
+        :param maximizing_color: color of the AI using this function to determine a move (tuple)
+        :param deadline: time.monotonic() value after which the search raises AI.SearchTimeout (float)
+        :param first_move: move to search first, e.g. the best move of the previous iteration (tuple)
+        :param stop: cancels the search, raising AI.SearchTimeout, when set from another thread (threading.Event)
+        :return: tuple representing move and eval; format: (move, eval)
+        """
+        moves = board.get_moves()
+        if not moves or depth == 0:
+            return AI.minimax(board, depth, -inf, inf, True, maximizing_color, NullTable())
+        if first_move in moves and not self.deterministic:
+            moves.remove(first_move)
+            moves.insert(0, first_move)
+
+        self.alpha.value = -inf
+        self.search_id.value += 1
+        futures = [self.executor.submit(_search_root_move, board, move, depth, maximizing_color,
+                                        self.deterministic, deadline, self.search_id.value) for move in moves]
+
+        # Keep the first move with the highest exact score, like the serial search does
+        best_move, best_eval = moves[0], -inf
+        try:
+            for move, future in zip(moves, futures):
+                while True:
+                    try:
+                        score, alpha = future.result(POLL_INTERVAL)
+                        break
+                    except TimeoutError:
+                        if stop is not None and stop.is_set():
+                            raise AI.SearchTimeout()
+                if score > alpha and score > best_eval:
+                    best_move, best_eval = move, score
+        except BaseException:
+            # Tell running tasks to stop as well as dropping the ones that haven't started
+            self.search_id.value += 1
+            for future in futures:
+                future.cancel()
+            raise
+
+        return best_move, best_eval
+
+    def shutdown(self):
+        """
+        Stops the worker processes
+        :return: None
+        """
+        self.executor.shutdown(cancel_futures=True)
@@ -0,0 +1,141 @@
+import argparse
+import time
+
+from bitboard import BitBoard
+from board import *
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
+
+# Standard test positions and their leaf counts per depth under this game's rules: no castling,
+# no en passant and pawns always promote to a queen. Castling rights are stripped from the FENs.
+# Counts that the rules don't affect are the published ones; the others were produced by the move
+# generator in this repository, cross-checked with DEBUG_LEGALITY.
+POSITIONS = [
+    ("start", START_FEN,
+     {1: 20, 2: 400, 3: 8902, 4: 197281}),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w - - 0 1",
+     {1: 46, 2: 1865, 3: 86585, 4: 3488552}),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     {1: 14, 2: 191, 3: 2810, 4: 43087}),
+    ("promotion", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w - - 0 1",
+     {1: 6, 2: 222, 3: 7855, 4: 305965}),
+    ("middlegame", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     {1: 46, 2: 2079, 3: 89890, 4: 3894594}),
+]
+
+
+def perft(board, depth):
+    """
+    Counts the leaf nodes of the move tree to the given depth
+    :param board: position to count from; left unchanged (Board)
+    :param depth: number of plies to search (int)
+    :return: int
+    """
+    if depth == 0:
+        return 1
+    moves = board.get_moves()
+    if depth == 1:
+        return len(moves)
+
+    nodes = 0
+    for move in moves:
+        board.make_move(move)
+        board.next_turn()
+        nodes += perft(board, depth - 1)
+        board.unmake_move()
+    return nodes
+
+
+def divide(board, depth):
+    """
+    Counts the leaf nodes below each root move
+    :param board: position to count from; left unchanged (Board)
+    :param depth: number of plies to search, including the root move (int)
+    :return: dict mapping move names such as "e2e4" to leaf counts
+    """
+    counts = {}
+    names = Board(board.player)
+    for move in board.get_moves():
+        board.make_move(move)
+        board.next_turn()
+        nodes = perft(board, depth - 1) if depth > 1 else 1
+        board.unmake_move()
+        source, dest = decode_move(move)
+        counts[names.square_name(source) + names.square_name(dest)] = nodes
+    return counts
+
+
+def load(fen, player=WHITE, bitboard=False):
+    """
+    Creates a board from a FEN string
+    :param fen: position in Forsyth-Edwards Notation (str)
+    :param player: color sitting at the bottom of the board (tuple)
+    :param bitboard: True to convert the board to a BitBoard (bool)
+    :return: Board or BitBoard
+    """
+    board = Board(player)
+    board.load_fen(fen)
+    if bitboard:
+        return BitBoard.from_board(board)
+    return board
+
+
+def run_suite(max_depth, player=WHITE, bitboard=False):
+    """
+    Runs perft on every test position up to max_depth and reports counts and speed
+    :param max_depth: deepest depth to run (int)
+    :param player: color sitting at the bottom of the board (tuple)
+    :param bitboard: True to run on BitBoard instead of Board (bool)
+    :return: True if every count matched
+    """
+    passed = True
+    total_nodes = 0
+    total_time = 0
+    for name, fen, expected in POSITIONS:
+        board = load(fen, player, bitboard)
+        for depth in sorted(expected):
+            if depth > max_depth:
+                break
+            start = time.perf_counter()
+            nodes = perft(board, depth)
+            elapsed = time.perf_counter() - start
+            total_nodes += nodes
+            total_time += elapsed
+            ok = nodes == expected[depth]
+            passed = passed and ok
+            print(f"{name:<11} depth {depth}  {nodes:>9} nodes  {elapsed:8.3f}s  {nodes / elapsed:9.0f} nps  "
+                  f"{'ok' if ok else 'FAIL (expected ' + str(expected[depth]) + ')'}")
+    if total_time:
+        print(f"total {total_nodes} nodes in {total_time:.3f}s, {total_nodes / total_time:.0f} nps")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count and time move generation")
+    parser.add_argument("--fen", default=START_FEN, help="position to count from")
+    parser.add_argument("--depth", type=int, default=3, help="number of plies")
+    parser.add_argument("--divide", action="store_true", help="print the count below each root move")
+    parser.add_argument("--suite", action="store_true", help="run all test positions up to --depth")
+    parser.add_argument("--black", action="store_true", help="put black at the bottom of the board")
+    parser.add_argument("--bitboard", action="store_true", help="count on BitBoard instead of Board")
+    args = parser.parse_args()
+    player = BLACK if args.black else WHITE
+
+    if args.suite:
+        raise SystemExit(0 if run_suite(args.depth, player, args.bitboard) else 1)
+
+    board = load(args.fen, player, args.bitboard)
+    start = time.perf_counter()
+    if args.divide:
+        counts = divide(board, args.depth)
+        for move in sorted(counts):
+            print(f"{move}: {counts[move]}")
+        nodes = sum(counts.values())
+    else:
+        nodes = perft(board, args.depth)
+    elapsed = time.perf_counter() - start
+    print(f"nodes {nodes}  time {elapsed:.3f}s  nps {nodes / elapsed:.0f}")
+
+
+if __name__ == "__main__":
+    main()
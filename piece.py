@@ -1,33 +1,69 @@
-import os
-
 from settings import *
 
-K_b = pygame.image.load(os.path.join("img", "king-black.png"))
-Q_b = pygame.image.load(os.path.join("img", "queen-black.png"))
-B_b = pygame.image.load(os.path.join("img", "bishop-black.png"))
-H_b = pygame.image.load(os.path.join("img", "knight-black.png"))
-R_b = pygame.image.load(os.path.join("img", "rook-black.png"))
-P_b = pygame.image.load(os.path.join("img", "pawn-black.png"))
-
-K_w = pygame.image.load(os.path.join("img", "king-white.png"))
-Q_w = pygame.image.load(os.path.join("img", "queen-white.png"))
-B_w = pygame.image.load(os.path.join("img", "bishop-white.png"))
-H_w = pygame.image.load(os.path.join("img", "knight-white.png"))
-R_w = pygame.image.load(os.path.join("img", "rook-white.png"))
-P_w = pygame.image.load(os.path.join("img", "pawn-white.png"))
-
-IMAGES = [pygame.transform.scale(K_w, IMG_SCALE),
-          pygame.transform.scale(K_b, IMG_SCALE),
-          pygame.transform.scale(Q_w, IMG_SCALE),
-          pygame.transform.scale(Q_b, IMG_SCALE),
-          pygame.transform.scale(B_w, IMG_SCALE),
-          pygame.transform.scale(B_b, IMG_SCALE),
-          pygame.transform.scale(H_w, IMG_SCALE),
-          pygame.transform.scale(H_b, IMG_SCALE),
-          pygame.transform.scale(R_w, IMG_SCALE),
-          pygame.transform.scale(R_b, IMG_SCALE),
-          pygame.transform.scale(P_w, IMG_SCALE),
-          pygame.transform.scale(P_b, IMG_SCALE)]
+
+def _targets(offsets):
+    """
+    Builds a table of the on-board squares at the given offsets from each square
+    :param offsets: (dx, dy) pairs, in the order the squares should be listed (tuple)
+    :return: list indexed [x][y] of lists of coords
+    """
+    return [[[(x + dx, y + dy) for dx, dy in offsets if 0 <= x + dx < 8 and 0 <= y + dy < 8]
+             for y in range(8)] for x in range(8)]
+
+
+def _rays(directions):
+    """
+    Builds a table of rays from each square, each ray ordered outward from the square
+    :param directions: (dx, dy) steps, in the order the rays should be listed (tuple)
+    :return: list indexed [x][y] of lists of rays, each a list of coords
+    """
+    return [[[[(x + dx * i, y + dy * i) for i in range(1, 8) if 0 <= x + dx * i < 8 and 0 <= y + dy * i < 8]
+              for dx, dy in directions] for y in range(8)] for x in range(8)]
+
+
+# Move tables, built once at import and indexed [x][y]
+KNIGHT_TARGETS = _targets(((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)))
+KING_TARGETS = _targets(((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)))
+
+# Rays up, down, left and right / up left, up right, down left and down right
+ROOK_RAYS = _rays(((0, -1), (0, 1), (-1, 0), (1, 0)))
+BISHOP_RAYS = _rays(((-1, -1), (1, -1), (-1, 1), (1, 1)))
+
+# Indexed [0] for pawns moving up the board (the bottom player's) and [1] for pawns moving down
+PAWN_ATTACKS = (_targets(((-1, -1), (1, -1))), _targets(((-1, 1), (1, 1))))
+
+
+def slide(piece, board, rays):
+    """
+    Returns the moves of a sliding piece along the given rays, stopping at the first piece on each ray
+    :param piece: piece that is moving (Piece)
+    :param board: the current board being used for the game (Board)
+    :param rays: rays from the piece's square, e.g. ROOK_RAYS[x][y] (list)
+    :return: list of coords
+    """
+    moves = []
+    tilemap = board.tilemap
+    for ray in rays:
+        for x, y in ray:
+            other = tilemap[x][y].piece
+            if other:
+                if other.color != piece.color:
+                    moves.append((x, y))
+                break
+            moves.append((x, y))
+    return moves
+
+
+def step(piece, board, targets):
+    """
+    Returns the moves of a non-sliding piece to the given targets that aren't occupied by its own color
+    :param piece: piece that is moving (Piece)
+    :param board: the current board being used for the game (Board)
+    :param targets: target coords, e.g. KNIGHT_TARGETS[x][y] (list)
+    :return: list of coords
+    """
+    tilemap = board.tilemap
+    return [(x, y) for x, y in targets if tilemap[x][y].piece is None or tilemap[x][y].piece.color != piece.color]
 
 
 class Piece:
@@ -39,16 +75,6 @@ class Piece:
         self.image = None
         self.firstMove = True
 
-    def draw(self):
-        """
-        Draws piece
-        :return: None
-        """
-        if self.color == WHITE:
-            SCREEN.blit(IMAGES[self.image], to_coords(self.x, self.y))
-        else:
-            SCREEN.blit(IMAGES[self.image+1], to_coords(self.x, self.y))
-
     def move(self, x, y):
         """
         Updates x and y coordinates for Piece
@@ -80,14 +106,9 @@ class King(Piece):
         return "King"
 
     def valid_moves(self, board):
-        moves = []
 
         # Move 1 in each direction
-        for x in range(self.x-1, self.x+2):
-            for y in range(self.y-1, self.y+2):
-                if board.valid_move((x, y), self.color):
-                    moves.append((x, y))
-        return moves
+        return step(self, board, KING_TARGETS[self.x][self.y])
 
 
 class Queen(Piece):
@@ -117,45 +138,9 @@ class Bishop(Piece):
         return "Bishop"
 
     def valid_moves(self, board):
-        moves = []
-
-        # Up left
-        x, y = self.x, self.y
-        while board.valid_move((x-1, y-1), self.color):
-            moves.append((x-1, y-1))
-            if board.piece_at_coords((x-1, y-1)):
-                break
-            x -= 1
-            y -= 1
-
-        # Up right
-        x, y = self.x, self.y
-        while board.valid_move((x+1, y-1), self.color):
-            moves.append((x+1, y-1))
-            if board.piece_at_coords((x+1, y-1)):
-                break
-            x += 1
-            y -= 1
-
-        # Down left
-        x, y = self.x, self.y
-        while board.valid_move((x-1, y+1), self.color):
-            moves.append((x-1, y+1))
-            if board.piece_at_coords((x-1, y+1)):
-                break
-            x -= 1
-            y += 1
-
-        # Down right
-        x, y = self.x, self.y
-        while board.valid_move((x+1, y+1), self.color):
-            moves.append((x+1, y+1))
-            if board.piece_at_coords((x+1, y+1)):
-                break
-            x += 1
-            y += 1
 
-        return moves
+        # Up left, up right, down left, down right
+        return slide(self, board, BISHOP_RAYS[self.x][self.y])
 
 
 class Knight(Piece):
@@ -168,15 +153,9 @@ class Knight(Piece):
         return "Knight"
 
     def valid_moves(self, board):
-        moves = []
 
         # Move 1 diagonal, 1 straight
-        for x in range(self.x-2, self.x+3):
-            for y in range(self.y-2, self.y+3):
-                if abs(self.x - x) == 2 and abs(self.y - y) == 1 or abs(self.x - x) == 1 and abs(self.y - y) == 2:
-                    if board.valid_move((x, y), self.color):
-                        moves.append((x, y))
-        return moves
+        return step(self, board, KNIGHT_TARGETS[self.x][self.y])
 
 
 class Rook(Piece):
@@ -189,37 +168,9 @@ class Rook(Piece):
         return "Rook"
 
     def valid_moves(self, board):
-        moves = []
 
-        # Up
-        for y in range(self.y-1, -1, -1):
-            if board.valid_move((self.x, y), self.color):
-                moves.append((self.x, y))
-            if board.piece_at_coords((self.x, y)):
-                break
-
-        # Down
-        for y in range(self.y+1, 8, 1):
-            if board.valid_move((self.x, y), self.color):
-                moves.append((self.x, y))
-            if board.piece_at_coords((self.x, y)):
-                break
-
-        # Left
-        for x in range(self.x-1, -1, -1):
-            if board.valid_move((x, self.y), self.color):
-                moves.append((x, self.y))
-            if board.piece_at_coords((x, self.y)):
-                break
-
-        # Right
-        for x in range(self.x+1, 8, 1):
-            if board.valid_move((x, self.y), self.color):
-                moves.append((x, self.y))
-            if board.piece_at_coords((x, self.y)):
-                break
-
-        return moves
+        # Up, down, left, right
+        return slide(self, board, ROOK_RAYS[self.x][self.y])
 
 
 class Pawn(Piece):
@@ -233,48 +184,25 @@ class Pawn(Piece):
 
     def valid_moves(self, board):
         moves = []
+        tilemap = board.tilemap
 
         if board.bottomPlayerTurn:
-            # Move forward 1
-            if board.valid_move((self.x, self.y-1), self.color) \
-                    and not board.piece_at_coords((self.x, self.y-1)):
-                moves.append((self.x, self.y-1))
-
-                # Move forward 2 on first move
-                if board.valid_move((self.x, self.y-2), self.color) \
-                        and not board.piece_at_coords((self.x, self.y-2)) \
-                        and self.firstMove:
-                    moves.append((self.x, self.y-2))
-
-            # Attack diagonal left
-            if board.valid_move((self.x-1, self.y-1), self.color) \
-                    and board.enemy_at_coords((self.x-1, self.y-1), self.color):
-                moves.append((self.x-1, self.y-1))
-
-            # Attack diagonal right
-            if board.valid_move((self.x+1, self.y-1), self.color) \
-                    and board.enemy_at_coords((self.x+1, self.y-1), self.color):
-                moves.append((self.x+1, self.y-1))
+            direction, dy = 0, -1
         else:
-            # Move forward 1
-            if board.valid_move((self.x, self.y+1), self.color) \
-                    and not board.piece_at_coords((self.x, self.y+1)):
-                moves.append((self.x, self.y+1))
-
-                # Move forward 2 on first move
-                if board.valid_move((self.x, self.y+2), self.color) \
-                        and not board.piece_at_coords((self.x, self.y+2)) \
-                        and self.firstMove:
-                    moves.append((self.x, self.y+2))
-
-            # Attack diagonal left
-            if board.valid_move((self.x-1, self.y+1), self.color) \
-                    and board.enemy_at_coords((self.x-1, self.y+1), self.color):
-                moves.append((self.x-1, self.y+1))
-
-            # Attack diagonal right
-            if board.valid_move((self.x+1, self.y+1), self.color) \
-                    and board.enemy_at_coords((self.x+1, self.y+1), self.color):
-                moves.append((self.x+1, self.y+1))
-
-        return list(set(moves))
+            direction, dy = 1, 1
+
+        # Move forward 1
+        y = self.y + dy
+        if 0 <= y < 8 and tilemap[self.x][y].piece is None:
+            moves.append((self.x, y))
+
+            # Move forward 2 on first move
+            if self.firstMove and 0 <= y + dy < 8 and tilemap[self.x][y + dy].piece is None:
+                moves.append((self.x, y + dy))
+
+        # Attack diagonal left and right
+        for x, y in PAWN_ATTACKS[direction][self.x][self.y]:
+            if tilemap[x][y].piece and tilemap[x][y].piece.color != self.color:
+                moves.append((x, y))
+
+        return moves
@@ -0,0 +1,165 @@
+import os
+from functools import lru_cache
+
+import pygame
+
+from settings import *
+
+# Create screen
+SCREEN = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+# Number of rendered strings render_text keeps
+TEXT_CACHE_SIZE = 256
+
+
+def load_image(name):
+    """
+    Loads an image from the img folder and scales it to the size of a tile
+    :param name: file name of the image (str)
+    :return: pygame.Surface
+    """
+    return pygame.transform.scale(pygame.image.load(os.path.join("img", name)), IMG_SCALE)
+
+
+# Indexed by Piece.image (+1 for black pieces)
+IMAGES = [load_image("king-white.png"),
+          load_image("king-black.png"),
+          load_image("queen-white.png"),
+          load_image("queen-black.png"),
+          load_image("bishop-white.png"),
+          load_image("bishop-black.png"),
+          load_image("knight-white.png"),
+          load_image("knight-black.png"),
+          load_image("rook-white.png"),
+          load_image("rook-black.png"),
+          load_image("pawn-white.png"),
+          load_image("pawn-black.png")]
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(font, text, color):
+    """
+    Renders antialiased text, reusing the surface if the same text was rendered recently; callers only blit the
+    surface, so sharing it is safe
+    :param font: font to render with (pygame.font.Font)
+    :param text: text to render (str)
+    :param color: color of the text (tuple)
+    :return: pygame.Surface
+    """
+    return font.render(text, True, color)
+
+
+def to_grid(pos):
+    """
+    Converts pixel coordinates to 8x8 grid locations
+    :param pos: pixel coordinates, e.g. the mouse position (tuple)
+    :return: tuple representing grid coordinates; may be out of bounds
+    """
+    return (pos[0] - BOARD_X) // TILE_SIZE, (pos[1] - BOARD_Y) // TILE_SIZE
+
+
+def draw_piece(piece):
+    """
+    Draws piece
+    :param piece: piece to draw (Piece)
+    :return: None
+    """
+    if piece.color == WHITE:
+        SCREEN.blit(IMAGES[piece.image], to_coords(piece.x, piece.y))
+    else:
+        SCREEN.blit(IMAGES[piece.image+1], to_coords(piece.x, piece.y))
+
+
+def draw_tile(tile):
+    """
+    Draws tile and the piece it contains (if applicable)
+    :param tile: tile to draw (Tile)
+    :return: None
+    """
+    x, y = to_coords(tile.x, tile.y)
+    pygame.draw.rect(SCREEN, tile.fill_color, [x, y, TILE_SIZE, TILE_SIZE])
+    if tile.piece:
+        draw_piece(tile.piece)
+
+
+def draw_board(board):
+    """
+    Draws all components of the board
+    :param board: board to draw (Board)
+    :return: None
+    """
+
+    # Draw tiles and pieces
+    for row in board.tilemap:
+        for tile in row:
+            draw_tile(tile)
+
+    # Draw circles to indicate valid move locations
+    if board.selected:
+        for move in board.moves_from((board.selected.piece.x, board.selected.piece.y)):
+            tup = to_coords(move[0], move[1])
+            x = tup[0] + int(TILE_SIZE / 2)
+            y = tup[1] + int(TILE_SIZE / 2)
+            pygame.draw.circle(SCREEN, LARGE_TEXT_COLOR, (x, y), 10)
+
+
+def render_background(board):
+    """
+    Pre-renders everything that stays the same during a game: the window background and the empty board
+    :param board: board whose tile colors to use (Board)
+    :return: pygame.Surface the size of the screen
+    """
+    background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)).convert()
+    background.fill(BG_COLOR)
+    for row in board.tilemap:
+        for tile in row:
+            x, y = to_coords(tile.x, tile.y)
+            pygame.draw.rect(background, tile.color, [x, y, TILE_SIZE, TILE_SIZE])
+    return background
+
+
+class BoardView:
+
+    def __init__(self, background):
+        """
+        Draws the board by redrawing only the tiles that changed since the last frame
+        :param background: pre-rendered background from render_background (pygame.Surface)
+        """
+        self.background = background
+
+        # What each tile looked like when it was last drawn; format: (fill color, piece image, move hint)
+        self.drawn = {}
+
+    def draw(self, board):
+        """
+        Draws the tiles whose color, piece or move hint changed
+        :param board: board to draw (Board)
+        :return: list of pygame.Rect that were drawn on, to pass to pygame.display.update
+        """
+        hints = ()
+        if board.selected and board.selected.piece:
+            hints = board.moves_from((board.selected.piece.x, board.selected.piece.y))
+
+        dirty = []
+        for row in board.tilemap:
+            for tile in row:
+                piece = tile.piece
+                image = None
+                if piece:
+                    image = piece.image if piece.color == WHITE else piece.image + 1
+                state = (tile.fill_color, image, (tile.x, tile.y) in hints)
+                if self.drawn.get((tile.x, tile.y)) == state:
+                    continue
+                self.drawn[tile.x, tile.y] = state
+
+                rect = pygame.Rect(to_coords(tile.x, tile.y), IMG_SCALE)
+                if tile.fill_color == tile.color:
+                    SCREEN.blit(self.background, rect, rect)
+                else:
+                    pygame.draw.rect(SCREEN, tile.fill_color, rect)
+                if image is not None:
+                    SCREEN.blit(IMAGES[image], rect)
+                if state[2]:
+                    pygame.draw.circle(SCREEN, LARGE_TEXT_COLOR, rect.center, 10)
+                dirty.append(rect)
+        return dirty
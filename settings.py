@@ -1,5 +1,3 @@
-import pygame
-
 # Screen components
 TILE_SIZE = 64
 SCREEN_WIDTH = 800
@@ -22,9 +20,6 @@ TILE_COLOR_LIGHT = (241, 250, 238)
 TILE_COLOR_DARK = (69, 123, 157)
 HIGHLIGHT_COLOR = (51, 153, 255)
 
-# Create screen
-SCREEN = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-
 
 # Converts 8x8 grid locations to pixel coordinates
 def to_coords(x, y):
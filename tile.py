@@ -7,15 +7,15 @@ class Tile:
         self.x = x
         self.y = y
         self.color = BLACK
-        self.surface = pygame.Surface((TILE_SIZE, TILE_SIZE))
+        self.fill_color = BLACK
 
     def fill(self, color):
         """
-        Fills tile with specified color
+        Sets the color the tile is drawn with
         :param color: color to fill tile with (tuple)
         :return: None
         """
-        self.surface.fill(color)
+        self.fill_color = color
 
     def select(self):
         """
@@ -24,16 +24,6 @@ class Tile:
         """
         if self.contains_piece():
             self.fill(HIGHLIGHT_COLOR)
-            self.draw()
-
-    def draw(self):
-        """
-        Draws tile and the piece it contains (if applicable)
-        :return: None
-        """
-        SCREEN.blit(self.surface, to_coords(self.x, self.y))
-        if self.piece:
-            self.piece.draw()
 
     def contains_piece(self):
         """
@@ -53,5 +43,6 @@ class Tile:
         if self.piece:
             piece = self.piece.copy()
         copy = Tile(piece, self.x, self.y)
+        copy.color = self.color
         copy.fill(self.color)
         return copy
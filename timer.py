@@ -1,5 +1,7 @@
-from settings import *
+import pygame
 import pygame_menu
+from settings import *
+from render import SCREEN, render_text
 
 
 class Timer:
@@ -9,24 +11,48 @@ class Timer:
         self.pos = pos
         self.font = pygame.font.Font(pygame_menu.font.FONT_OPEN_SANS_BOLD, 18)
 
+        # Text currently on screen, so the timer is only redrawn when it changes
+        self.drawn = None
+
     def tick(self, dt):
         self.time -= dt
 
     def reset(self):
         self.time = self.initial_time
+        self.drawn = None
+
+    def invalidate(self):
+        self.drawn = None
+
+    def until_change(self):
+        """
+        Returns how long until the displayed time changes: whole seconds above 10 seconds, tenths below
+        :return: milliseconds (int)
+        """
+        step = 1 if self.time > 10 else 0.1
+        return int(self.time % step * 1000) + 1
 
     def draw(self):
+        """
+        Draws the remaining time if it changed since it was last drawn
+        :return: pygame.Rect that was drawn on, or None if nothing changed
+        """
         mins, secs = divmod(self.time, 60)
         ms = divmod(self.time, 1000)[1]
         if self.time <= 10:
             s = f'{ms:.01f}'
         else:
             s = f'{int(mins):02}:{int(secs):02}'
-        txt = self.font.render(s, True, SMALL_TEXT_COLOR)
+        if s == self.drawn:
+            return None
+        self.drawn = s
+        txt = render_text(self.font, s, SMALL_TEXT_COLOR)
         if self.pos == "top":
-            pygame.draw.rect(SCREEN, BG_COLOR_LIGHT, [BOARD_X + BOARD_SIZE - TILE_SIZE, BOARD_Y - 36, TILE_SIZE, 28])
+            rect = pygame.draw.rect(SCREEN, BG_COLOR_LIGHT,
+                                    [BOARD_X + BOARD_SIZE - TILE_SIZE, BOARD_Y - 36, TILE_SIZE, 28])
             SCREEN.blit(txt, (BOARD_X + BOARD_SIZE - TILE_SIZE + 8, BOARD_Y - 34))
         else:
-            pygame.draw.rect(SCREEN, BG_COLOR_LIGHT,
-                             [BOARD_X+BOARD_SIZE-TILE_SIZE, BOARD_Y+BOARD_SIZE+8, TILE_SIZE, 28])
+            rect = pygame.draw.rect(SCREEN, BG_COLOR_LIGHT,
+                                    [BOARD_X+BOARD_SIZE-TILE_SIZE, BOARD_Y+BOARD_SIZE+8, TILE_SIZE, 28])
             SCREEN.blit(txt, (BOARD_X+BOARD_SIZE-TILE_SIZE+8, BOARD_Y+BOARD_SIZE+10))
+        return rect
@@ -0,0 +1,121 @@
+# Bound types of a stored score
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Rough number of bytes a single stored entry costs in CPython (tuple, ints and the slot in the list)
+ENTRY_SIZE = 144
+
+
+class TranspositionTable:
+
+    def __init__(self, size_mb=16):
+        """
+        Fixed-size table of previously searched positions
+        :param size_mb: memory budget of the table in megabytes (int)
+        """
+        # Use a power of two number of slots so that indexing is a single mask
+        slots = 1
+        while slots * 2 * ENTRY_SIZE <= size_mb * 1024 * 1024:
+            slots *= 2
+        self.mask = slots - 1
+        self.entries = [None] * slots
+        self.age = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        """
+        Removes all entries and resets counters
+        :return: None
+        """
+        self.entries = [None] * len(self.entries)
+        self.age = 0
+        self.reset_stats()
+
+    def reset_stats(self):
+        """
+        Resets hit, miss, collision and store counters
+        :return: None
+        """
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+
+    def new_search(self):
+        """
+        Marks entries from previous searches as stale so they are replaced first
+        :return: None
+        """
+        self.age += 1
+
+    def probe(self, key):
+        """
+        Looks up a position
+        :param key: Zobrist key of the position (int)
+        :return: tuple of (depth, flag, score, move) or None
+        """
+        entry = self.entries[key & self.mask]
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry[0] != key:
+            # Slot is owned by a different position
+            self.collisions += 1
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry[1], entry[2], entry[3], entry[4]
+
+    def store(self, key, depth, flag, score, move):
+        """
+        Stores a search result, replacing the existing entry if it is from an older search,
+        for the same position, or searched to a lower or equal depth
+        :param key: Zobrist key of the position (int)
+        :param depth: remaining depth the position was searched to (int)
+        :param flag: EXACT, LOWER or UPPER (int)
+        :param score: score of the position (int)
+        :param move: best move found, packed (int)
+        :return: None
+        """
+        index = key & self.mask
+        entry = self.entries[index]
+        if entry is None or entry[0] == key or entry[5] != self.age or depth >= entry[1]:
+            self.entries[index] = (key, depth, flag, score, move, self.age)
+            self.stores += 1
+
+    def stats(self):
+        """
+        Returns usage counters of the table
+        :return: dict
+        """
+        probes = self.hits + self.misses
+        return {"slots": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "collisions": self.collisions,
+                "stores": self.stores,
+                "hit_rate": self.hits / probes if probes else 0.0}
+
+
+class NullTable:
+    """
+    Stand-in for TranspositionTable that never stores anything, so that search results don't depend on
+    what was searched before
+    """
+
+    def new_search(self):
+        pass
+
+    def probe(self, key):
+        return None
+
+    def store(self, key, depth, flag, score, move):
+        pass
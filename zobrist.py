@@ -0,0 +1,50 @@
+import random
+
+from piece import *
+
+# Fixed seed so that keys (and therefore hashes) are identical between runs and processes
+_rng = random.Random(0x5EED)
+
+
+def _random_key():
+    return _rng.getrandbits(64)
+
+
+# One key per (piece type, color, square); squares are indexed by x * 8 + y
+PIECE_KEYS = {(piece_type, color): [_random_key() for _ in range(64)]
+              for piece_type in (King, Queen, Bishop, Knight, Rook, Pawn)
+              for color in (WHITE, BLACK)}
+
+# Toggled whenever it is black's turn to move
+BLACK_TO_MOVE = _random_key()
+
+# Mixed into search keys when black is the maximizing color, since minimax scores are relative to that color
+BLACK_PERSPECTIVE = _random_key()
+
+
+def piece_key(piece, x, y):
+    """
+    Returns the Zobrist key of a piece standing on a square
+    :param piece: piece to get key for (Piece)
+    :param x: x coordinate on grid
+    :param y: y coordinate on grid
+    :return: int
+    """
+    return PIECE_KEYS[type(piece), piece.color][x * 8 + y]
+
+
+def hash_board(board):
+    """
+    Computes the Zobrist hash of a board from scratch
+    :param board: board to hash (Board)
+    :return: int
+    """
+    key = 0
+    for x in range(8):
+        for y in range(8):
+            piece = board.tilemap[x][y].piece
+            if piece:
+                key ^= piece_key(piece, x, y)
+    if board.turn == BLACK:
+        key ^= BLACK_TO_MOVE
+    return key